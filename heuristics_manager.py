@@ -4,6 +4,10 @@ from utilities import logger as lg
 from utilities.helper import Helper
 from utilities.stats import Stats
 from utilities.visualisation import Visualisation
+from utilities.fitness_cache import FitnessCache
+from utilities.trace import Trace
+from utilities.checkpoint import Checkpoint
+from utilities.result_cache import ResultCache
 from optimizers.particle import Particle
 from optimizers.variator import Variator
 from optimizers.crossover import Crossover
@@ -13,10 +17,14 @@ import os
 import sys
 import yaml
 from itertools import product
+import collections
 import copy
 from importlib import import_module
+from concurrent.futures import ProcessPoolExecutor
+import pickle
 import time
 import statistics
+import zlib
 seed = 42  # Define seed for both numpy.random and random.random
 np.random.seed(seed)
 script_name = os.path.basename(sys.argv[0]).split('.')
@@ -26,19 +34,27 @@ class HeuristicsManager:
     """
     Controller
     """
-    def __init__(self, results_path):
+    def __init__(self, results_path, workers=0, settings=None, plots=True, result_cache=False):
         lg.msg(logging.INFO, 'Initialising Heuristics Manager')
         self.results_path = results_path
+        self.workers = workers  # Worker processes executing runs, 0 to execute them in this process
         self.random = Random()
         self.random.seed(seed)
         self.vis = Visualisation()
-        self.settings = self.get_config()
+        self.settings = settings if settings is not None else self.get_config()  # Settings of a queue or resumed run
+        self.plots = plots and ('plots' not in self.settings['gen'] or self.settings['gen']['plots'])
+        self.checkpoint = None
+        # Result cache is opted into by general setting or command line
+        self.cache_results = result_cache or ('result_cache' in self.settings['gen'] and
+                                              self.settings['gen']['result_cache'])
+        self.result_cache = None
+        self.code_version = None
         self.problems_optimizers = []
         self.problems = []
         self.benchmarks = []
         self.optimizers = []
-        self.jobs = self.set_jobs()
-        self.exec_start_time = 0
+        self.summaries = {}  # Summary of each completed job by (pid, bid, oid), the job itself being released
+        self.plan = self.set_jobs()
 
     @staticmethod
     def get_config():
@@ -65,7 +81,12 @@ class HeuristicsManager:
         j.gft.append(j.rbest.fitness)
 
     def set_jobs(self):
-        jobs = []
+        """
+        Plan of jobs to execute as (pid, bid, oid) of enabled problems, benchmarks and optimizers. Jobs are created from
+        it only once about to execute, the low-level heuristics of a hyper-heuristic along with it, and released once
+        completed
+        """
+        plan = []
         self.problems = self.get_problems()
         self.benchmarks = self.get_benchmarks()
         self.optimizers = self.get_optimizers()
@@ -73,6 +94,8 @@ class HeuristicsManager:
         self.problems_optimizers.sort()
 
         for (pid, oid) in self.problems_optimizers:
+            if not self.settings['prb'][pid]['enabled'] or not self.settings['opt'][oid]['enabled']:
+                continue
             benchmarks = []
             if 'benchmarks' not in self.settings['prb'][pid]:
                 benchmarks.append('na')
@@ -82,11 +105,14 @@ class HeuristicsManager:
                         continue
                     benchmarks.append(bid)
             for bid in benchmarks:
-                jobs.append(self.create_job_spec(pid, oid, bid))
+                plan.append((pid, bid, oid))
 
         # Sort jobs by problem, benchmark and optimizer
-        jobs = sorted(jobs, key=lambda j: (j.pid, j.bid, j.oid), reverse=False)
-        return jobs
+        return sorted(plan)
+
+    def create_job(self, key):
+        pid, bid, oid = key
+        return self.create_job_spec(pid, oid, bid)
 
     def create_job_spec(self, *args):
         # Create new job specification
@@ -139,12 +165,47 @@ class HeuristicsManager:
         job.comp_budget_base = self.settings['gen']['comp_budget_base']
 
         # Problem class is instantiated here as dimension of problem determines allocated total budget
+        if 'dimension' in self.settings['prb'][job.pid]:
+            job.pid_dimension = self.settings['prb'][job.pid]['dimension']
+
         prob_module = import_module('problems.' + job.pid.lower())
         job.pid_cls = getattr(prob_module, job.pid)(random=self.random, hopjob=job)
 
         job.budget = job.pid_cls.n * job.comp_budget_base
+
+        # ----- Fitness Cache
+        # Optional bounded cache of candidate fitness, avoiding re-evaluation of repeated candidates e.g. GA clones
+        if 'fitness_cache' in self.settings['gen']:
+            job.fitness_cache = self.settings['gen']['fitness_cache']
+            job.fitness_cache_size = self.settings['gen']['fitness_cache_size']
+            job.fitness_cache_charge_hits = self.settings['gen']['fitness_cache_charge_hits']
+
+        if job.fitness_cache:
+            job.pid_cls.fitness_cache = FitnessCache(size=job.fitness_cache_size,
+                                                     charge_hits=job.fitness_cache_charge_hits)
         job.budget_total = job.budget
 
+        # ----- Fitness Trace
+        # Run fitness trend recorded as (evaluation, best fitness) points, capped in memory however long the run
+        if 'trace_capacity' in self.settings['gen']:
+            job.trace_capacity = self.settings['gen']['trace_capacity']
+
+        if 'trace_spacing' in self.settings['gen']:
+            job.trace_spacing = self.settings['gen']['trace_spacing']
+
+        if 'trace_log_ratio' in self.settings['gen']:
+            job.trace_log_ratio = self.settings['gen']['trace_log_ratio']
+
+        # ----- Charts
+        job.plots = self.plots
+
+        # Runs are checkpointed on completion and, except runs of Inspyred optimizers, whilst in flight
+        if 'checkpoints' in self.settings['gen']:
+            job.checkpoints = self.settings['gen']['checkpoints']
+
+        if 'checkpoint_interval_s' in self.settings['gen']:
+            job.checkpoint_interval_s = self.settings['gen']['checkpoint_interval_s']
+
         # ----- Iterations since last improvement and improvement count
         job.iter_last_imp = [job.budget_total for _ in range(job.runs_per_optimizer)]
         job.imp_count = [0 for _ in range(job.runs_per_optimizer)]
@@ -159,6 +220,18 @@ class HeuristicsManager:
         if 'llh_budget_coeff' in self.settings['opt'][job.oid]:
             job.llh_budget = int(self.settings['opt'][job.oid]['llh_sample_budget_coeff'] * job.budget)
 
+        if 'llh_archive_size' in self.settings['opt'][job.oid]:
+            job.llh_archive_size = self.settings['opt'][job.oid]['llh_archive_size']
+
+        if 'llh_workers' in self.settings['opt'][job.oid]:
+            job.llh_workers = self.settings['opt'][job.oid]['llh_workers']
+
+        if 'llh_speculative' in self.settings['opt'][job.oid]:
+            job.llh_speculative = self.settings['opt'][job.oid]['llh_speculative']
+
+        if 'llh_warm_start' in self.settings['opt'][job.oid]:
+            job.llh_warm_start = self.settings['opt'][job.oid]['llh_warm_start']
+
         # ----- Binary Encoding
         # Define bit length for optimizers like GA that encode between real and binary
         job.bit_computing = self.settings['gen']['bit_computing']
@@ -198,10 +271,47 @@ class HeuristicsManager:
         if 'parent_gene_similarity_threshold' in self.settings['opt'][job.oid]:
             job.parent_gene_similarity_threshold = self.settings['opt'][job.oid]['parent_gene_similarity_threshold']
 
+        # ----- Variation
+        if 'best_insertion_budget_coeff' in self.settings['opt'][job.oid]:
+            job.best_insertion_budget_coeff = self.settings['opt'][job.oid]['best_insertion_budget_coeff']
+
+        # ----- Vectorized engine
+        if 'vectorized' in self.settings['opt'][job.oid]:
+            job.vectorized = self.settings['opt'][job.oid]['vectorized']
+
+        # ----- Differential evolution and evolution strategy
+        if 'de_strategy' in self.settings['opt'][job.oid]:
+            job.de_strategy = self.settings['opt'][job.oid]['de_strategy']
+
+        if 'differential_weight' in self.settings['opt'][job.oid]:
+            job.differential_weight = self.settings['opt'][job.oid]['differential_weight']
+
+        if 'crossover_rate' in self.settings['opt'][job.oid]:
+            job.crossover_rate = self.settings['opt'][job.oid]['crossover_rate']
+
+        if 'es_selection' in self.settings['opt'][job.oid]:
+            job.es_selection = self.settings['opt'][job.oid]['es_selection']
+
+        if 'offspring_coeff' in self.settings['opt'][job.oid]:
+            job.offspring_coeff = self.settings['opt'][job.oid]['offspring_coeff']
+
+        # ----- In-place moves
+        if 'inplace' in self.settings['opt'][job.oid]:
+            job.inplace = self.settings['opt'][job.oid]['inplace']
+
         # ----- Annealing
         if 'reheat' in self.settings['opt'][job.oid]:
             job.reheat = self.settings['opt'][job.oid]['reheat']
 
+        if 'chains' in self.settings['opt'][job.oid]:
+            job.chains = self.settings['opt'][job.oid]['chains']
+
+        if 'temp_ladder_ratio' in self.settings['opt'][job.oid]:
+            job.temp_ladder_ratio = self.settings['opt'][job.oid]['temp_ladder_ratio']
+
+        if 'tempering_interval' in self.settings['opt'][job.oid]:
+            job.tempering_interval = self.settings['opt'][job.oid]['tempering_interval']
+
         # ----- Instantiate optimizer class
         opt_module = import_module('optimizers.' + job.oid_optimizer.lower())
         job.oid_cls = getattr(opt_module, job.oid_optimizer)(random=self.random, hopjob=job)
@@ -219,9 +329,13 @@ class HeuristicsManager:
 
         if 'variator' in self.settings['opt'][job.oid]:
             job.variator = getattr(job.variator_cls, 'variator_' + self.settings['opt'][job.oid]['variator'])
+            job.variator_inplace = getattr(job.variator_cls,
+                                           'variator_' + self.settings['opt'][job.oid]['variator'] + '_inplace')
 
         if 'crossover' in self.settings['opt'][job.oid]:
             job.crossover = getattr(job.crossover_cls, 'crossover_' + self.settings['opt'][job.oid]['crossover'])
+            job.crossover_batch = getattr(job.crossover_cls,
+                                          'crossover_' + self.settings['opt'][job.oid]['crossover'] + '_batch')
 
         return job
 
@@ -251,47 +365,197 @@ class HeuristicsManager:
         return optimizers
 
     def execute_jobs(self):
-        for j in self.jobs:
-
-            if j.pid_enabled and j.oid_enabled:
-                pass
-            else:
-                continue
+        # Runs completed before resuming from checkpoints are not executed again
+        if 'checkpoints' in self.settings['gen'] and self.settings['gen']['checkpoints']:
+            self.checkpoint = Checkpoint(self.results_path + '/checkpoints')
+            Checkpoint.save(self.checkpoint.path + '/settings.pkl', self.settings)
+
+        # Runs computed by earlier invocations with identical settings, data and code are taken from the result cache
+        if self.cache_results:
+            self.result_cache = ResultCache(self.settings['gen']['result_cache_path'])
+            self.code_version = ResultCache.code_version(os.path.dirname(os.path.abspath(__file__)))
+
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(max_workers=self.workers)
+
+        # Jobs are prepared in plan order and completed in turn. With workers, runs of following jobs are submitted
+        # ahead as far as needed to keep every worker busy, so jobs held at once stay few
+        plan = collections.deque(self.plan)
+        prepared = collections.deque()
+        while plan or prepared:
+            while plan and (not prepared or pool is not None and
+                            sum(len(p['futures']) for p in prepared) < 2 * self.workers):
+                prepared.append(self.prepare_job(self.create_job(plan.popleft()), pool))
+            self.complete_job(*self.run_results(prepared.popleft()))
+
+        if pool is not None:
+            pool.shutdown()
 
-            j.start_time = time.time()
+        self.summary()
 
-            if j.bid != 'na':
-                lg.msg(logging.INFO, 'Benchmark {}'.format(j.bid))
-            lg.msg(logging.INFO, 'Optimizing {} with {} ({})'.format(j.pid_desc, j.oid, j.oid_desc))
-            lg.msg(logging.INFO, 'Executing {} sample runs'.format(j.runs_per_optimizer))
+    def prepare_job(self, j, pool):
+        """
+        Runs of job, each either completed before, submitted to pool or left to execute when completing the job
+        """
+        prepared = {'job': j, 'spec': None, 'keys': {}, 'completed': {}, 'futures': {}}
+        for r in range(j.runs_per_optimizer):
+            if self.result_cache is not None:
+                prepared['keys'][r] = self.result_key(j, r)
+            result = self.stored_result(j, r, prepared['keys'].get(r))
+            if result is not None:
+                prepared['completed'][r] = result
+                continue
 
+            # Every run starts from its job as specified, whichever runs executed before it and wherever it executes
+            if prepared['spec'] is None:
+                prepared['spec'] = self.job_spec(j)
+            if pool is not None:
+                prepared['futures'][r] = pool.submit(execute_run, prepared['spec'], r, self.run_seed(j, r),
+                                                     self.run_file(j, r))
+
+        if prepared['completed']:
+            lg.msg(logging.INFO, 'Reusing {} of {} runs of {} completed before'.format(
+                len(prepared['completed']), j.runs_per_optimizer, j.oid))
+        return prepared
+
+    def stored_result(self, j, run, key):
+        # Result of run checkpointed before resuming, otherwise computed by an earlier invocation, if any
+        result = None
+        if self.checkpoint is not None:
+            result = Checkpoint.load(Checkpoint.result_file(self.checkpoint.run_file(j, run)))
+        if result is None and self.result_cache is not None:
+            result = self.result_cache.get(key)
+        return result
+
+    def run_results(self, prepared):
+        """
+        Job with results of its runs in run order, executing those neither completed before nor submitted
+        """
+        j = prepared['job']
+
+        def results():
             for r in range(j.runs_per_optimizer):
-                j.run = r
-                self.pre_processing(j)  # Controller pre-processing
-                j.pid_cls.pre_processing()  # Problem pre-processing
-                j.oid_cls.run(jobs=self.jobs, fromhyper=False)  # Execute optimizer
-                self.post_processing(j)  # Controller post-processing
-
-            j.avg_comp_time_s = j.total_comp_time_s / j.runs_per_optimizer
+                if r in prepared['completed']:
+                    yield prepared['completed'].pop(r)
+                    continue
+                if r in prepared['futures']:
+                    result = prepared['futures'].pop(r).result()
+                else:
+                    result = execute_run(prepared['spec'], r, self.run_seed(j, r), self.run_file(j, r))
+                if self.result_cache is not None:
+                    self.result_cache.put(prepared['keys'][r], result)
+                yield result
+
+        return j, results()
+
+    def run_file(self, j, run):
+        # Checkpoint file name of a run, None without checkpoints
+        if self.checkpoint is None:
+            return None
+        return self.checkpoint.run_file(j, run)
+
+    def enqueue_jobs(self, queue):
+        """
+        Lay out runs of enabled jobs as work items of queue, to be executed by any number of workers and then merged
+        """
+        blobs = {}
+        items = []
+        for ji, key in enumerate(self.plan):
+            j = self.create_job(key)
+            blob = 'job{:05d}.pkl'.format(ji)
+            blobs[blob] = self.job_spec(j)
+            for r in range(j.runs_per_optimizer):
+                items.append(('{:05d}-{:05d}'.format(ji, r), blob, (r, self.run_seed(j, r))))
 
-            # Execute problem-specific tasks upon optimization completion e.g. generate Gantt chart of best schedule
-            j.pid_cls.post_processing()
+        queue.create({'results_path': self.results_path, 'settings': self.settings, 'jobs': self.plan}, items, blobs)
+        lg.msg(logging.INFO, 'Queued {} runs of {} jobs in {}'.format(len(items), len(self.plan), queue.path))
 
-            lg.msg(logging.INFO, 'Completed optimizing {} with {} ({})'.format(j.pid_desc, j.oid, j.oid_desc))
+    def merge_jobs(self, queue):
+        """
+        Complete enabled jobs from results of their runs executed by queue workers, as if executed here
+        """
+        for key in self.plan:
+            j = self.create_job(key)
+            ji = queue.manifest['jobs'].index(key)
+            self.complete_job(j, (queue.result('{:05d}-{:05d}'.format(ji, r)) for r in range(j.runs_per_optimizer)))
 
         self.summary()
 
-    def pre_processing(self, j):
+    def complete_job(self, j, results):
+        """
+        Post-process results of job runs, consumed in run order, and keep its summary
+        """
+        j.start_time = time.time()
+
+        if j.bid != 'na':
+            lg.msg(logging.INFO, 'Benchmark {}'.format(j.bid))
+        lg.msg(logging.INFO, 'Optimizing {} with {} ({})'.format(j.pid_desc, j.oid, j.oid_desc))
+        lg.msg(logging.INFO, 'Executing {} sample runs'.format(j.runs_per_optimizer))
+
+        for r in range(j.runs_per_optimizer):
+            j.run = r
+            self.post_processing(j, next(results))  # Controller post-processing
+
+        j.avg_comp_time_s = j.total_comp_time_s / j.runs_per_optimizer
+
+        # Execute problem-specific tasks upon optimization completion e.g. generate Gantt chart of best schedule
+        j.pid_cls.post_processing()
+
+        lg.msg(logging.INFO, 'Completed optimizing {} with {} ({})'.format(j.pid_desc, j.oid, j.oid_desc))
+        self.summaries[(j.pid, j.bid, j.oid)] = self.job_summary(j)
+
+    def job_spec(self, j):
+        """
+        Pickled job with the low-level heuristic jobs of its problem and benchmark it may call on, created here for it
+        alone and pickled together so components keep sharing one random stream
+        """
+        llh_jobs = [self.create_job((j.pid, j.bid, oid)) for oid in sorted(set(j.low_level_selection_pool))]
+        return pickle.dumps((j, llh_jobs))
+
+    def result_key(self, j, run):
+        """
+        Result cache key of a run from the settings, data and code determining its result, leaving out those which do
+        not, e.g. enabled flags and runs per optimizer
+        """
+        prb = {k: v for k, v in self.settings['prb'][j.pid].items() if k not in ('enabled', 'benchmarks')}
+        opt = {oid: {k: v for k, v in self.settings['opt'][oid].items() if k != 'enabled'}
+               for oid in [j.oid] + j.low_level_selection_pool}
+        gen = {k: v for k, v in self.settings['gen'].items()
+               if k not in ('runs_per_optimizer', 'plots', 'checkpoints', 'checkpoint_interval_s', 'result_cache',
+                            'result_cache_path')}
+        return ResultCache.key({'pid': j.pid, 'bid': j.bid, 'benchmark': j.pid_cls.benchmark_digest(), 'problem': prb,
+                                'optimizers': opt, 'general': gen, 'code': self.code_version,
+                                'seed': self.run_seed(j, run)})
+
+    @staticmethod
+    def run_seed(j, run):
+        # Seed of a run from its problem, benchmark, optimizer and run number, independent of execution order
+        key = [zlib.crc32(k.encode()) for k in (j.pid, j.bid, j.oid)] + [run]
+        return int(np.random.SeedSequence(seed, spawn_key=key).generate_state(1, dtype=np.uint64)[0])
+
+    @staticmethod
+    def pre_processing(j):
         lg.msg(logging.INFO, 'Starting optimizer {} run {}'.format(j.oid, str(j.run)))
-        self.exec_start_time = time.time()
 
-        j.rft = []
+        j.rft = Trace(capacity=j.trace_capacity, spacing=j.trace_spacing, log_ratio=j.trace_log_ratio)
         j.rbest = Particle()
         j.population = []
+        j.pid_cls.clear_fitness_cache()  # Runs are independent so fitness is not carried over between them
 
-    def post_processing(self, j):
+    def post_processing(self, j, result):
+        # Run results of an executed job copy
         j.end_time = time.time()
-        j.total_comp_time_s += time.time() - self.exec_start_time
+        j.total_comp_time_s += result['comp_time_s']
+        j.rbest = result['rbest']
+        j.rft = result['rft']
+        j.budget = result['budget']
+        j.iter_last_imp[j.run] = result['iter_last_imp']
+        j.imp_count[j.run] = result['imp_count']
+        if j.pid_cls.fitness_cache is not None:
+            j.pid_cls.fitness_cache.hits += result['cache'][0]
+            j.pid_cls.fitness_cache.misses += result['cache'][1]
+            j.pid_cls.fitness_cache.evictions += result['cache'][2]
 
         if isinstance(j.rbest.candidate[0], float) and j.pid_type == 'combinatorial':
             j.rbest.candidate = j.pid_cls.candidate_spv_continuous_to_discrete(j.rbest.candidate)
@@ -303,8 +567,9 @@ class HeuristicsManager:
         self.log_optimizer_fitness(j)
 
         filename = self.results_path + '/' + j.pid + ' ' + j.bid + ' ' + j.oid + ' rbest fitness trend run ' + str(j.run)
-        self.vis.fitness_trend(j.rft, filename)  # Plot run-specific trend
-        Helper.write_to_csv(j.rft, filename + '.csv', header=False)
+        if j.plots:
+            self.vis.fitness_trend(j.rft, filename)  # Plot run-specific trend
+        Helper.write_to_csv(j.rft.records(), filename + '.csv', header=False)
 
         if j.run == j.runs_per_optimizer - 1:
             return
@@ -315,6 +580,44 @@ class HeuristicsManager:
     def load_components(self):
         pass
 
+    @staticmethod
+    def job_summary(j):
+        """
+        Fitness of each run, bounds diff pct and other stats of a completed job, as reported by summary
+        """
+        other = {}
+        other['avg_comp_time_s'] = j.avg_comp_time_s
+        other['budget'] = j.budget_total
+        other['budget_rem'] = j.budget
+        if j.iter_last_imp:
+            other['avg_iter_last_imp'] = int(statistics.mean(j.iter_last_imp))
+        else:
+            other['avg_iter_last_imp'] = 'n/a'
+
+        if other['avg_iter_last_imp'] != 'n/a':
+            other['budget_no_imp_pct'] = round(
+                ((j.budget_total - other['avg_iter_last_imp']) / j.budget_total) * 100, 2)
+        else:
+            other['budget_no_imp_pct'] = 'n/a'
+
+        if j.imp_count:
+            other['avg_imp_count'] = int(statistics.mean(j.imp_count))
+        else:
+            other['avg_imp_count'] = 'n/a'
+
+        if j.pid_cls.fitness_cache is not None:
+            other['cache'] = [j.pid_cls.fitness_cache.hits, j.pid_cls.fitness_cache.misses,
+                              j.pid_cls.fitness_cache.evictions]
+        else:
+            other['cache'] = ['n/a'] * 3
+
+        if j.bid != 'na':
+            bdp = [j.pid_cls.ilb, j.pid_lb_diff_pct, j.pid_cls.iub, j.pid_ub_diff_pct]
+        else:
+            bdp = ['na'] * 4
+
+        return j.gft, bdp, other
+
     def summary(self):
         lg.msg(logging.INFO, 'Statistics')
         summary = []
@@ -329,38 +632,12 @@ class HeuristicsManager:
                 for o in self.optimizers:
                     if not self.settings['opt'][o]['enabled']:
                         continue
-                    for j in self.jobs:
-                        if not (j.pid == p and j.bid == b and j.oid == o):
-                            continue
-                        if _new_benchmark:
-                            lg.msg(logging.INFO, 'Summary for problem {} benchmark {}'.format(p, b))
-                            _new_benchmark = False
-                        gbest_ft[j.oid] = {}
-                        gbest_ft[j.oid] = j.gft
-                        bdp[j.oid] = {}
-                        other[j.oid] = {}
-                        other[j.oid]['avg_comp_time_s'] = j.avg_comp_time_s
-                        other[j.oid]['budget'] = j.budget_total
-                        other[j.oid]['budget_rem'] = j.budget
-                        if j.iter_last_imp:
-                            other[j.oid]['avg_iter_last_imp'] = int(statistics.mean(j.iter_last_imp))
-                        else:
-                            other[j.oid]['avg_iter_last_imp'] = 'n/a'
-
-                        if other[j.oid]['avg_iter_last_imp'] != 'n/a':
-                            other[j.oid]['budget_no_imp_pct'] = round(((j.budget_total - other[j.oid]['avg_iter_last_imp']) / j.budget_total) * 100, 2)
-                        else:
-                            other[j.oid]['budget_no_imp_pct'] = 'n/a'
-
-                        if j.imp_count:
-                            other[j.oid]['avg_imp_count'] = int(statistics.mean(j.imp_count))
-                        else:
-                            other[j.oid]['avg_imp_count'] = 'n/a'
-
-                        if j.bid != 'na':
-                            bdp[j.oid] = [j.pid_cls.ilb, j.pid_lb_diff_pct, j.pid_cls.iub, j.pid_ub_diff_pct]
-                        else:
-                            bdp[j.oid] = ['na'] * 4
+                    if (p, b, o) not in self.summaries:
+                        continue
+                    if _new_benchmark:
+                        lg.msg(logging.INFO, 'Summary for problem {} benchmark {}'.format(p, b))
+                        _new_benchmark = False
+                    gbest_ft[o], bdp[o], other[o] = self.summaries[(p, b, o)]
 
                 # Only proceed for compiled stats for valid problem/benchmark/optimizer
                 if not gbest_ft:
@@ -368,11 +645,11 @@ class HeuristicsManager:
 
                 stats_summary = Stats.get_summary(gbest_ft)
 
-                format_spec = "{:>30}" * 16
+                format_spec = "{:>30}" * 19
 
                 cols = ['Optimizer', 'Min Fitness', 'Max Fitness', 'Avg Fitness', 'StDev', 'Wilcoxon', 'LB', 'LB Diff %',
                         'UB', 'UB Diff %', 'Avg Cts', 'Budget', 'Budget Rem', 'Avg Iter Last Imp', 'Budget No Imp %',
-                        'Avg Imp Count']
+                        'Avg Imp Count', 'Cache Hits', 'Cache Misses', 'Cache Evictions']
                 summary.append(cols)
                 lg.msg(logging.INFO, format_spec.format(*cols))
 
@@ -392,16 +669,82 @@ class HeuristicsManager:
                                                             other[k]['budget_rem'],
                                                             other[k]['avg_iter_last_imp'],
                                                             other[k]['budget_no_imp_pct'],
-                                                            other[k]['avg_imp_count']))
+                                                            other[k]['avg_imp_count'],
+                                                            *other[k]['cache']))
                     summary.append([str(k), str(v['minf']), str(v['maxf']), str(v['mean']), str(v['stdev']), str(v['wts']),
                                    str(bdp[k][0]), str(bdp[k][1]), str(bdp[k][2]), str(bdp[k][3]),
                                     str(round(other[k]['avg_comp_time_s'], 3)), other[k]['budget'], other[k]['budget_rem'],
-                                    other[k]['avg_iter_last_imp'], other[k]['budget_no_imp_pct'], other[k]['avg_imp_count']])
+                                    other[k]['avg_iter_last_imp'], other[k]['budget_no_imp_pct'], other[k]['avg_imp_count'],
+                                    *other[k]['cache']])
 
                 # Summary per problem
                 Helper.write_to_csv(summary, self.results_path + '/' + p + ' ' + b + ' problem summary.csv')
 
                 # Fitness trend for all optimizers per problem
                 filename = self.results_path + '/' + p + ' ' + b + ' all optimizers gbest fitness trend'
-                self.vis.fitness_trend_all_optimizers(gbest_ft, filename)
+                if self.plots:
+                    self.vis.fitness_trend_all_optimizers(gbest_ft, filename)
                 Helper.write_to_csv(gbest_ft, filename + '.csv')
+
+
+def execute_run(spec, run, run_seed, run_file=None):
+    """
+    Execute a run on a copy of its job unpickled from spec, with random streams seeded for the run, returning its
+    results. Used alike for runs executed in the controller and by worker processes, so their results are identical.
+    With a checkpoint run file, the run continues from any state checkpointed in flight and its results are checkpointed
+    """
+    inflight = Checkpoint.load(Checkpoint.inflight_file(run_file)) if run_file is not None else None
+    if inflight is not None:
+        j, llh_jobs = pickle.loads(inflight['state'])
+        np.random.set_state(inflight['np_random'])
+        j.run_start_time = time.time() - inflight['elapsed_s']
+        lg.msg(logging.INFO, 'Resuming optimizer {} run {} with budget {} remaining'.format(
+            j.oid, str(j.run), j.budget))
+        j.oid_cls.run(jobs=llh_jobs, fromhyper=False, resume=True)  # Continue optimizer from checkpointed state
+    else:
+        j, llh_jobs = pickle.loads(spec)
+        j.run = run
+        j.oid_cls.random.seed(run_seed)
+        np.random.seed(run_seed % 2 ** 32)
+
+        HeuristicsManager.pre_processing(j)  # Controller pre-processing
+        j.pid_cls.pre_processing()  # Problem pre-processing
+        j.run_start_time = time.time()
+        if run_file is not None:
+            j.checkpoint_file = Checkpoint.inflight_file(run_file)
+            j.checkpoint_time = j.run_start_time
+        j.oid_cls.run(jobs=llh_jobs, fromhyper=False)  # Execute optimizer
+
+    cache = j.pid_cls.fitness_cache
+    result = {'rbest': j.rbest, 'rft': j.rft, 'budget': j.budget, 'iter_last_imp': j.iter_last_imp[run],
+              'imp_count': j.imp_count[run], 'comp_time_s': time.time() - j.run_start_time,
+              'cache': (cache.hits, cache.misses, cache.evictions) if cache is not None else None}
+
+    if run_file is not None:
+        Checkpoint.save(Checkpoint.result_file(run_file), result)
+        Checkpoint.discard(Checkpoint.inflight_file(run_file))
+    return result
+
+
+def work(queue, poll_s=5):
+    """
+    Execute queued runs until every run of queue has a result, claiming one at a time. Whilst runs claimed by other
+    workers are outstanding, wait in case their lease expires
+    """
+    queue.load()
+    specs = {}
+    while True:
+        item = queue.claim()
+        if item is None:
+            if not queue.pending():
+                return
+            time.sleep(poll_s)
+            continue
+
+        item_id, blob, (run, run_seed) = item
+        if blob not in specs:
+            specs = {blob: queue.blob(blob)}  # Items of a job are claimed together, so hold a single spec
+        lg.msg(logging.INFO, 'Worker {} executing item {}'.format(queue.worker_id, item_id))
+        with queue.lease(item_id):
+            result = execute_run(specs[blob], run, run_seed)
+        queue.complete(item_id, result)
@@ -1,4 +1,5 @@
 from optimizers.particle import Particle
+from utilities.trace import Trace
 
 
 class HopJob:
@@ -18,6 +19,9 @@ class HopJob:
 
         self.bid = None
 
+        # Problem dimension for problems like continuous functions, which are not defined by a benchmark instance
+        self.pid_dimension = 0
+
         # Active component flags
         self.pid_enabled = False
         self.oid_enabled = False
@@ -33,6 +37,11 @@ class HopJob:
         self.llh_sample_runs = 0
         self.llh_sample_budget = 0
         self.llh_budget = 0
+        self.llh_archive_size = 100  # Best candidates held per low-level heuristic and across them
+        self.llh_workers = 0  # Worker processes running low-level heuristics, 0 to run them in the hyper process
+        self.llh_speculative = 1  # Low-level heuristics selected and run at once per step when using workers
+        self.llh_warm_start = False  # Low-level heuristics continue their search state between invocations
+        self.warm_start = False  # Set on a low-level heuristic by a hyper-heuristic warm starting it
 
         # Computational Budget
         self.runs_per_optimizer = 0
@@ -40,6 +49,25 @@ class HopJob:
         self.budget = 0  # Budget that is consumed
         self.budget_total = 0  # Persists total allocated budget, used to calculate last iteration improvement etc
 
+        # Fitness cache
+        self.fitness_cache = False
+        self.fitness_cache_size = 0
+        self.fitness_cache_charge_hits = True
+
+        # Fitness trace, bounded to capacity points spaced by improvement or log of evaluation index
+        self.trace_capacity = 1000
+        self.trace_spacing = 'improvement'
+        self.trace_log_ratio = 1.1
+
+        # Charts of results, none in headless mode so plotting libraries are never imported
+        self.plots = True
+
+        # Checkpoints of runs, with state of a run in flight written at most every interval to continue it from
+        self.checkpoints = False
+        self.checkpoint_interval_s = 300
+        self.checkpoint_file = None  # State file of the run in flight, set where it executes
+        self.checkpoint_time = 0
+
         # Binary Encoding
         self.bit_computing = 16
 
@@ -61,24 +89,43 @@ class HopJob:
         self.initial_pop_size = 0
         self.parent_gene_similarity_threshold = 0.0
 
+        # Array-backed (vectorized) optimizer engine
+        self.vectorized = False
+
+        # Differential evolution and evolution strategy
+        self.de_strategy = 'rand/1/bin'  # Or best/1/bin
+        self.differential_weight = 0.5
+        self.crossover_rate = 0.9
+        self.es_selection = 'plus'  # (mu+lambda), or comma for (mu,lambda)
+        self.offspring_coeff = 1.0  # Lambda as a multiple of mu
+
         # Annealing
         self.reheat = False
+        self.chains = 1  # Chains advanced in lockstep, sharing the budget
+        self.temp_ladder_ratio = 1.0  # Initial temperature of each chain relative to the previous
+        self.tempering_interval = 0  # Steps between state exchanges of neighbouring temperatures, 0 for none
+
+        # Variator moves applied in place and undone on rejection
+        self.inplace = False
 
         # Solution generators, variator and crossover
         self.generator_comb = None
         self.generator_cont = None
         self.variator = None
+        self.variator_inplace = None
         self.crossover = None
+        self.crossover_batch = None
 
         # Runtime stats
         self.rbest = Particle()
         self.gbest = Particle()
-        self.rft = []
+        self.rft = Trace()
         self.gft = []
         self.llh_oid_run_count = 0
         self.llh_oid_aggr_imp = 0
         self.start_time = 0
         self.end_time = 0
+        self.run_start_time = 0
         self.total_comp_time_s = 0
         self.avg_comp_time_s = 0
         self.iter_last_imp = []  # Iteration of last improvement
@@ -86,6 +133,7 @@ class HopJob:
 
         # Various co-efficients
         self.sample_size_coeff = 0.01  # Usually used as n dim * (budget * sample size coeff)
+        self.best_insertion_budget_coeff = 1.0  # Share of insertion positions charged per best insertion move
         self.inertia_coeff = 0.0
         self.local_coeff = 0.0
         self.global_coeff = 0.0
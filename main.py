@@ -1,7 +1,10 @@
-from heuristics_manager import HeuristicsManager
+from heuristics_manager import HeuristicsManager, work
 import logging
 from utilities import logger as lg
 from utilities.visualisation import Visualisation
+from utilities.work_queue import WorkQueue
+from utilities.checkpoint import Checkpoint
+import argparse
 import os
 from datetime import datetime
 
@@ -10,15 +13,36 @@ class HeuristicOptimizerPlatform:
     """
     Heuristic Optimizer Platform
     """
-    def __init__(self):
-        self.results_path = 'results/hoprun_' + datetime.now().strftime("%Y%m%d-%H%M%S")
-        self.create_results_folder()
+    def __init__(self, workers=0, command=None, queue=None, resume=None, plots=True, result_cache=False):
+        settings = None
+        if command == 'merge':
+            # Results of queued runs are merged into the results directory created when queueing them
+            self.results_path = queue.load()['results_path']
+            settings = queue.manifest['settings']
+        elif resume is not None:
+            # Resumed runs continue in their results directory with the settings they started with
+            self.results_path = resume.rstrip('/')
+            settings = Checkpoint.load(self.results_path + '/checkpoints/settings.pkl')
+            if settings is None:
+                print('No checkpoints to resume from in {}'.format(self.results_path))
+                raise SystemExit(1)
+        else:
+            self.results_path = 'results/hoprun_' + datetime.now().strftime("%Y%m%d-%H%M%S")
+            self.create_results_folder()
         self.set_log_file()
         lg.msg(logging.INFO, 'Heuristic Optimizer Platform (HOP) starting...')
 
-        self.hm = HeuristicsManager(results_path=self.results_path)
+        self.hm = HeuristicsManager(results_path=self.results_path, workers=workers, settings=settings, plots=plots,
+                                    result_cache=result_cache)
         self.vis = Visualisation()
-        self.optimize()
+        if command == 'queue':
+            if queue is None:
+                queue = WorkQueue(self.results_path + '/queue')
+            self.hm.enqueue_jobs(queue)
+        elif command == 'merge':
+            self.merge(queue)
+        else:
+            self.optimize()
         lg.msg(logging.INFO, 'Heuristic Optimizer Platform (HOP) completed')
 
     def create_results_folder(self):
@@ -41,7 +65,54 @@ class HeuristicOptimizerPlatform:
     def optimize(self):
         self.hm.execute_jobs()
 
+    def merge(self, queue):
+        pending = queue.pending()
+        if pending:
+            lg.msg(logging.INFO, '{} queued runs have no result yet, e.g. {}'.format(len(pending), pending[0][0]))
+            raise SystemExit(1)
+        self.hm.merge_jobs(queue)
+
+
+def worker(queue, poll_s):
+    """
+    Execute queued runs, any number of workers sharing the queue directory
+    """
+    os.makedirs(queue.path + '/logs', exist_ok=True)
+    logging.basicConfig(filename=queue.path + '/logs/hoplog_worker_' + queue.worker_id + '.txt', level=logging.INFO,
+                        format='[%(asctime)s] [%(levelname)8s] %(message)s')
+    lg.msg(logging.INFO, 'Heuristic Optimizer Platform (HOP) worker {} starting...'.format(queue.worker_id))
+    work(queue, poll_s=poll_s)
+    lg.msg(logging.INFO, 'Heuristic Optimizer Platform (HOP) worker {} completed'.format(queue.worker_id))
+
 
 if __name__ == "__main__":
-    hop = HeuristicOptimizerPlatform()
+    parser = argparse.ArgumentParser(description='Heuristic Optimizer Platform (HOP)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='worker processes executing optimizer runs in parallel, 0 to execute them one by one')
+    parser.add_argument('--resume', metavar='RESULTS_PATH',
+                        help='continue an interrupted sweep from checkpoints in its results directory')
+    parser.add_argument('--no-plots', dest='plots', action='store_false',
+                        help='headless mode writing results without charts, never importing plotting libraries')
+    parser.add_argument('--result-cache', action='store_true',
+                        help='reuse runs computed by earlier invocations with identical settings, data and code')
+    commands = parser.add_subparsers(dest='command',
+                                     help='execute runs through a queue directory shared by workers on any hosts')
+    queue_parser = commands.add_parser('queue', help='queue optimizer runs, by default in results directory')
+    queue_parser.add_argument('queue', nargs='?', help='queue directory')
+    worker_parser = commands.add_parser('worker', help='execute queued optimizer runs until none are left')
+    worker_parser.add_argument('queue', help='queue directory')
+    worker_parser.add_argument('--lease', type=float, default=60,
+                               help='seconds before a run claimed by an unresponsive worker is claimable again')
+    worker_parser.add_argument('--poll', type=float, default=5,
+                               help='seconds between checks for claimable runs whilst others are executing')
+    merge_parser = commands.add_parser('merge', help='summarise queued optimizer runs once all are executed')
+    merge_parser.add_argument('queue', help='queue directory')
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        worker(WorkQueue(args.queue, lease_s=args.lease), args.poll)
+    else:
+        hop = HeuristicOptimizerPlatform(workers=args.workers, command=args.command,
+                                         queue=WorkQueue(args.queue) if args.command and args.queue else None,
+                                         resume=args.resume, plots=args.plots, result_cache=args.result_cache)
 
@@ -4,96 +4,110 @@ class Crossover:
         self.random = kwargs['random']
         self.hj = kwargs['hopjob']
 
+    @staticmethod
+    def gene_positions(parent):
+        # Position index of each gene of a permutation, for O(1) membership of a parent slice
+        positions = [0] * len(parent)
+        for i, gene in enumerate(parent):
+            positions[gene] = i
+        return positions
+
     def crossover_one_point(self, parent0, parent1):
+        return self.crossover_one_point_batch(parent0, parent1, 1)[0]
+
+    def crossover_one_point_batch(self, parent0, parent1, number_children):
+        children = []
         if self.hj.pid_type == 'combinatorial':
-            cp = self.random.randint(1, (len(parent0) - 1))
-            child = parent0[:cp]
-            # Add missing genes from second parent
-            for c in parent1:
-                if c not in child:
-                    child.append(c)
+            positions = self.gene_positions(parent0)
+            for _ in range(number_children):
+                cp = self.random.randint(1, (len(parent0) - 1))
+                # Add missing genes from second parent, i.e. those beyond the cut point of the first
+                child = parent0[:cp] + [c for c in parent1 if positions[c] >= cp]
+                children.append(child)
         else:
-            child = []
-            for pi, p in enumerate(parent0):
-                cp = self.random.randint(1, (len(p) - 1))
-                # Continuous without discrete values is simpler, take slice from each parent
-                cv = parent0[pi][:cp] + parent1[pi][cp:]
-                child.append(cv)
-        return child
+            for _ in range(number_children):
+                child = []
+                for pi, p in enumerate(parent0):
+                    cp = self.random.randint(1, (len(p) - 1))
+                    # Continuous without discrete values is simpler, take slice from each parent
+                    cv = parent0[pi][:cp] + parent1[pi][cp:]
+                    child.append(cv)
+                children.append(child)
+        return children
 
     def crossover_two_point(self, parent0, parent1):
-        if self.hj.pid_type == 'combinatorial':
-            cp = sorted(self.random.sample(range(1, len(parent0) - 1), 2))
+        return self.crossover_two_point_batch(parent0, parent1, 1)[0]
 
-            # Take 2 slices from first parent and concatenate
-            child = parent0[0:cp[0]] + parent0[cp[1]:]
-
-            # List child missing genes, taking their order from second parent
-            from_parent1 = []
-            for c in parent1:
-                if c not in child:
-                    from_parent1.append(c)
+    def crossover_two_point_batch(self, parent0, parent1, number_children):
+        children = []
+        if self.hj.pid_type == 'combinatorial':
+            positions = self.gene_positions(parent0)
+            for _ in range(number_children):
+                cp = sorted(self.random.sample(range(1, len(parent0) - 1), 2))
 
-            # Insert required "genes" starting from cp idx
-            for gene in reversed(from_parent1):
-                child.insert(cp[0], gene)
+                # Take 2 slices from first parent, with missing genes between them in order of second parent
+                from_parent1 = [c for c in parent1 if cp[0] <= positions[c] < cp[1]]
+                child = parent0[0:cp[0]] + from_parent1 + parent0[cp[1]:]
+                children.append(child)
         else:
-            child = []
-            for pi, p in enumerate(parent0):
-                cp = sorted(self.random.sample(range(1, len(p) - 1), 2))
-                # Continuous without discrete values is simpler, take slices from parents
-                cv = parent0[pi][0:cp[0]] + parent1[pi][cp[0]:cp[1]] + parent0[pi][cp[1]:]
-                child.append(cv)
-        return child
+            for _ in range(number_children):
+                child = []
+                for pi, p in enumerate(parent0):
+                    cp = sorted(self.random.sample(range(1, len(p) - 1), 2))
+                    # Continuous without discrete values is simpler, take slices from parents
+                    cv = parent0[pi][0:cp[0]] + parent1[pi][cp[0]:cp[1]] + parent0[pi][cp[1]:]
+                    child.append(cv)
+                children.append(child)
+        return children
 
     def crossover_sbox(self, parent0, parent1):
+        return self.crossover_sbox_batch(parent0, parent1, 1)[0]
+
+    def crossover_sbox_batch(self, parent0, parent1, number_children):
+        children = []
         if self.hj.pid_type == 'combinatorial':
-            child = [-1] * len(parent0)
-            cp = self.random.randint(1, (len(parent0) - 1))
-            pi = 0
-            while pi < (len(parent0) - 1):
-                if parent0[pi:pi+2] == parent1[pi:pi+2]:
-                    child[pi:pi+2] = parent0[pi:pi+2]
-                    pi += 2
-                else:
-                    pi += 1
-            for ci, c in enumerate(parent0[0:cp]):
-                if c not in child:
-                    try:
-                        index = child.index(-1)
-                    except ValueError:
-                        break
-                    child[index] = c
-            for ci, c in enumerate(parent1):
-                if c not in child:
-                    try:
-                        index = child.index(-1)
-                    except ValueError:
-                        break
+            # Adjacent gene pairs common to both parents are retained by every child
+            template = self.sbox_common_pairs(parent0, parent1)
+            free = [i for i, c in enumerate(template) if c == -1]
+            placed = [False] * len(parent0)
+            for c in template:
+                if c != -1:
+                    placed[c] = True
+            positions = self.gene_positions(parent0)
+
+            for _ in range(number_children):
+                cp = self.random.randint(1, (len(parent0) - 1))
+
+                # Free positions filled in order by missing genes of the first parent's slice, then the second parent
+                child = list(template)
+                genes = [c for c in parent0[0:cp] if not placed[c]] + \
+                        [c for c in parent1 if not placed[c] and positions[c] >= cp]
+                for index, c in zip(free, genes):
                     child[index] = c
+                children.append(child)
         else:
-            child = []
-            for pi0, p0 in enumerate(parent0):
-                _child = [-1] * len(p0)
-                cp = self.random.randint(1, (len(p0) - 1))
-                pi = 0
-                while pi < (len(p0) - 1):
-                    if parent0[pi0][pi:pi + 2] == parent1[pi0][pi:pi + 2]:
-                        _child[pi:pi + 2] = parent0[pi0][pi:pi + 2]
-                        pi += 2
-                    else:
-                        pi += 1
-                for ci, c in enumerate(parent0[pi0][0:cp]):
-                    try:
-                        index = _child.index(-1)
-                    except ValueError:
-                        break
-                    _child[index] = c
-                for ci, c in enumerate(parent1[pi0]):
-                    try:
-                        index = _child.index(-1)
-                    except ValueError:
-                        break
-                    _child[index] = c
-                child.append(_child)
+            for _ in range(number_children):
+                child = []
+                for pi0, p0 in enumerate(parent0):
+                    cp = self.random.randint(1, (len(p0) - 1))
+                    _child = self.sbox_common_pairs(parent0[pi0], parent1[pi0])
+
+                    # Free positions filled in order by the first parent's slice, then the second parent
+                    free = [i for i, c in enumerate(_child) if c == -1]
+                    for index, c in zip(free, parent0[pi0][0:cp] + parent1[pi0]):
+                        _child[index] = c
+                    child.append(_child)
+                children.append(child)
+        return children
+
+    @staticmethod
+    def sbox_common_pairs(parent0, parent1):
+        child = [-1] * len(parent0)
+        pi = 0
+        while pi < (len(parent0) - 1):
+            if parent0[pi:pi+2] == parent1[pi:pi+2]:
+                child[pi:pi+2] = parent0[pi:pi+2]
+                pi += 2
+            else:
+                pi += 1
         return child
@@ -1,5 +1,4 @@
 from optimizers.optimizer import Optimizer
-import inspyred
 from optimizers.inspyred_wrapper import InspyredWrapper
 
 
@@ -11,6 +10,8 @@ class DEA(Optimizer):
         self.evolve()
 
     def evolve(self):
+        import inspyred  # Imported on first use, so only by processes executing runs
+
         dea = inspyred.ec.DEA(self.random)
         dea.observer = InspyredWrapper.observer
         dea.terminator = inspyred.ec.terminators.evaluation_termination
@@ -25,6 +26,3 @@ class DEA(Optimizer):
         final_pop.sort(reverse=True)
         self.hj.rbest.fitness = final_pop[0].fitness
         self.hj.rbest.candidate = final_pop[0].candidate
-
-        self.hj.rft = list(set(self.hj.rft))  # Remove duplicates
-        self.hj.rft.sort(reverse=True)
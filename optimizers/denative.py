@@ -0,0 +1,64 @@
+from optimizers.optimizer import Optimizer
+import numpy as np
+
+
+class DENative(Optimizer):
+    """
+    Differential Evolution (rand/1/bin or best/1/bin) over a (pop, n) array of positions, with mutation, crossover and
+    selection applied to the whole population and each generation's trial vectors scored as one batch
+    """
+    def __init__(self, **kwargs):
+        Optimizer.__init__(self, **kwargs)
+
+    def optimize(self):
+        self.evolve()
+
+    def evolve(self):
+        # Resumed run continues from its checkpointed population and random stream
+        inflight = self.resume_state()
+        rng = inflight['rng'] if inflight is not None else np.random.default_rng(self.random.getrandbits(64))
+        lb, ub = self.position_bounds()
+
+        state = self.warm_state() if inflight is None else None
+        if inflight is not None:
+            positions, fitness = inflight['positions'], inflight['fitness']
+        elif state:
+            positions, fitness = state['positions'], state['fitness']
+            self.inject_incumbent(positions, fitness, lb, ub)
+            self.update_rbest(self.positions_to_candidates(positions), fitness)
+        else:
+            positions = self.initial_positions(rng, lb, ub)
+            candidates, fitness = self.evaluate_positions(positions)
+            positions = positions[:len(fitness)]
+            self.update_rbest(candidates, fitness)
+
+        pop, n = positions.shape
+        rows = np.arange(pop)
+        while self.hj.budget > 0 and pop >= 4:
+            self.checkpoint(rng=rng, positions=positions, fitness=fitness)
+            # Three distinct donors per target, none the target itself
+            keys = rng.random((pop, pop))
+            keys[rows, rows] = 2
+            donors = np.argpartition(keys, 3, axis=1)[:, :3]
+
+            if self.hj.de_strategy == 'best/1/bin':
+                base = positions[np.argmin(fitness)]
+            else:
+                base = positions[donors[:, 0]]
+            mutants = base + self.hj.differential_weight * (positions[donors[:, 1]] - positions[donors[:, 2]])
+
+            # Binomial crossover, taking at least one coordinate of each mutant
+            cross = rng.random((pop, n)) < self.hj.crossover_rate
+            cross[rows, rng.integers(0, n, pop)] = True
+            trials = np.clip(np.where(cross, mutants, positions), lb, ub)
+
+            trial_candidates, trial_fitness = self.evaluate_positions(trials)
+
+            # Trial replaces target when no worse
+            improved = np.flatnonzero(trial_fitness <= fitness[:len(trial_fitness)])
+            positions[improved] = trials[improved]
+            fitness = fitness.astype(np.result_type(fitness, trial_fitness))
+            fitness[improved] = trial_fitness[improved]
+            self.update_rbest(trial_candidates, trial_fitness)
+
+        self.save_state(positions=positions, fitness=fitness)
@@ -1,5 +1,4 @@
 from optimizers.optimizer import Optimizer
-import inspyred
 from optimizers.inspyred_wrapper import InspyredWrapper
 
 
@@ -11,6 +10,8 @@ class ES(Optimizer):
         self.evolve()
 
     def evolve(self):
+        import inspyred  # Imported on first use, so only by processes executing runs
+
         es = inspyred.ec.ES(self.random)
         es.observer = InspyredWrapper.observer
         es.terminator = [inspyred.ec.terminators.evaluation_termination,
@@ -28,5 +29,3 @@ class ES(Optimizer):
 
         # Inspyred ES extends candidate with strategy elements, slice for actual solution cand. associated with fitness
         self.hj.rbest.candidate = final_pop[0].candidate[:self.hj.pid_cls.n]
-        self.hj.rft = list(set(self.hj.rft))  # Remove duplicates
-        self.hj.rft.sort(reverse=True)
@@ -0,0 +1,67 @@
+from optimizers.optimizer import Optimizer
+import numpy as np
+
+
+class ESNative(Optimizer):
+    """
+    Evolution Strategy, (mu,lambda) or (mu+lambda), over a (mu, n) array of positions with self-adaptive step sizes,
+    each generation's lambda offspring mutated together and scored as one batch
+    """
+    def __init__(self, **kwargs):
+        Optimizer.__init__(self, **kwargs)
+
+    def optimize(self):
+        self.evolve()
+
+    def evolve(self):
+        # Resumed run continues from its checkpointed population and random stream
+        inflight = self.resume_state()
+        rng = inflight['rng'] if inflight is not None else np.random.default_rng(self.random.getrandbits(64))
+        lb, ub = self.position_bounds()
+
+        state = self.warm_state() if inflight is None else None
+        if inflight is not None:
+            positions, sigmas, fitness = inflight['positions'], inflight['sigmas'], inflight['fitness']
+        elif state:
+            positions, sigmas, fitness = state['positions'], state['sigmas'], state['fitness']
+            self.inject_incumbent(positions, fitness, lb, ub)
+            self.update_rbest(self.positions_to_candidates(positions), fitness)
+        else:
+            positions = self.initial_positions(rng, lb, ub)
+            candidates, fitness = self.evaluate_positions(positions)
+            positions = positions[:len(fitness)]
+            self.update_rbest(candidates, fitness)
+
+            # Log-normal self-adaptation of per coordinate step sizes
+            sigmas = np.full(positions.shape, 0.1 * (ub - lb))
+
+        mu, n = positions.shape
+        offspring = max(int(round(self.hj.offspring_coeff * mu)), 1)
+        if self.hj.es_selection == 'comma':
+            offspring = max(offspring, mu)  # Comma selection replaces the parents, so needs at least mu offspring
+
+        tau_global = 1 / np.sqrt(2 * n)
+        tau_local = 1 / np.sqrt(2 * np.sqrt(n))
+
+        while self.hj.budget > 0 and mu:
+            self.checkpoint(rng=rng, positions=positions, sigmas=sigmas, fitness=fitness)
+            parents = rng.integers(0, mu, offspring)
+            child_sigmas = sigmas[parents] * np.exp(tau_global * rng.standard_normal((offspring, 1)) +
+                                                    tau_local * rng.standard_normal((offspring, n)))
+            children = np.clip(positions[parents] + child_sigmas * rng.standard_normal((offspring, n)), lb, ub)
+
+            child_candidates, child_fitness = self.evaluate_positions(children)
+            children = children[:len(child_fitness)]
+            child_sigmas = child_sigmas[:len(child_fitness)]
+            self.update_rbest(child_candidates, child_fitness)
+
+            # Next parents are the best mu of offspring, or of parents and offspring together
+            if self.hj.es_selection == 'comma' and len(child_fitness) >= mu:
+                pool = children, child_sigmas, child_fitness
+            else:
+                pool = (np.concatenate((positions, children)), np.concatenate((sigmas, child_sigmas)),
+                        np.concatenate((fitness, child_fitness)))
+            survivors = np.argsort(pool[2], kind='stable')[:mu]
+            positions, sigmas, fitness = pool[0][survivors], pool[1][survivors], pool[2][survivors]
+
+        self.save_state(positions=positions, sigmas=sigmas, fitness=fitness)
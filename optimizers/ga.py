@@ -2,6 +2,7 @@ from optimizers.optimizer import Optimizer
 from optimizers.particle import Particle
 import logging
 from utilities import logger as lg
+import numpy as np
 import copy
 
 
@@ -14,9 +15,17 @@ class GA(Optimizer):
         self.children = []
 
     def optimize(self):
-        self.evolve()
+        if self.hj.vectorized:
+            self.evolve_vectorized()
+        else:
+            self.evolve()
+
+    def initial_population(self):
+        # Warm start continues from the previous population
+        state = self.warm_state()
+        if state:
+            self.hj.population = self.inject_incumbent_particle(state['population'])
 
-    def evolve(self):
         # Incoming population migrates to starting population, reset to fit GA
         if self.hj.population:
             self.reset_inherited_population_attr()
@@ -27,15 +36,27 @@ class GA(Optimizer):
             candidate.candidate = self.get_generator()(lb=self.hj.pid_lb, ub=self.hj.pid_ub)
             self.hj.population.append(candidate)
 
+    def evolve(self):
+        # Resumed run continues from its checkpointed population, held by the job
+        if self.resume_state() is None:
+            self.initial_population()
+
         while self.hj.budget > 0:
+            self.checkpoint()
+            budget = self.hj.budget
 
-            # Evaluate any new candidates
-            for ci, candidate in enumerate(self.hj.population):
-                if candidate.fitness == candidate.fitness_default:
+            # Evaluate any new candidates in a single batch
+            new_candidates = [c for c in self.hj.population if c.fitness == c.fitness_default]
+            if new_candidates:
+                batch = []
+                for candidate in new_candidates:
                     c = copy.deepcopy(candidate.candidate)
                     if self.get_generator().__name__ == 'generator_chromosome':
                         c = self.binary_to_float(c)
-                    candidate.fitness, self.hj.budget = self.hj.pid_cls.evaluator(c, self.hj.budget)
+                    batch.append(c)
+                fitness, self.hj.budget = self.hj.pid_cls.evaluate_batch(batch, self.hj.budget)
+                for candidate, f in zip(new_candidates, fitness.tolist()):
+                    candidate.fitness = f
 
             # Sort population by fitness ascending
             self.hj.population.sort(key=lambda x: x.fitness, reverse=False)
@@ -45,7 +66,7 @@ class GA(Optimizer):
                     self.hj.rbest.fitness, self.hj.population[0].fitness))
                 self.hj.rbest.fitness = self.hj.population[0].fitness
                 self.hj.rbest.candidate = self.hj.population[0].candidate
-                self.hj.rft.append(self.hj.population[0].fitness)
+                self.hj.rft.record(self.hj.budget_total - self.hj.budget, self.hj.population[0].fitness)
                 if not self.fromhyper:
                     self.hj.iter_last_imp[self.hj.run] = self.hj.budget_total - self.hj.budget
                     self.hj.imp_count[self.hj.run] += 1
@@ -59,6 +80,111 @@ class GA(Optimizer):
             self.children_mutate()
 
             self.hj.population = self.update_population()
+            self.charge_generation(budget)
+
+        self.save_state(population=self.hj.population)
+
+    def evolve_vectorized(self):
+        """
+        Population held as a (pop, n) permutation matrix, or (pop, n, bits) bit matrix for chromosomes, with a (pop,)
+        fitness array. Chromosomes are decoded with one product, parents drawn by SUS with searchsorted and new
+        candidates scored as one batch. Random draws follow evolve, so fitness trajectories match for the same seed
+        """
+        chromosome = self.get_generator().__name__ == 'generator_chromosome'
+        fitness_default = Particle().fitness_default
+
+        # Resumed run continues from its checkpointed population
+        inflight = self.resume_state()
+        if inflight is not None:
+            population, fitness = inflight['population'], inflight['fitness']
+        else:
+            # Warm start continues from the previous population
+            state = self.warm_state()
+            if state:
+                self.hj.population = self.inject_incumbent_particle(state['population'])
+
+            # Incoming population migrates to starting population, reset to fit GA
+            if self.hj.population:
+                self.reset_inherited_population_attr()
+
+            # Complete assembly of initial population size, accounting for any incoming migrant population
+            population = [c.candidate for c in self.hj.population]
+            fitness = [c.fitness for c in self.hj.population]
+            for i in range(self.hj.initial_pop_size - len(self.hj.population)):
+                population.append(self.get_generator()(lb=self.hj.pid_lb, ub=self.hj.pid_ub))
+                fitness.append(fitness_default)
+            population = np.array(population, dtype=np.uint8 if chromosome else np.int64)
+            fitness = np.array(fitness)
+
+        while self.hj.budget > 0:
+            self.checkpoint(population=population, fitness=fitness)
+            budget = self.hj.budget
+
+            # Evaluate any new candidates in a single batch
+            new = np.flatnonzero(fitness == fitness_default)
+            if new.size:
+                batch = self.binary_to_float_batch(population[new]) if chromosome else population[new]
+                new_fitness, self.hj.budget = self.hj.pid_cls.evaluate_batch(batch, self.hj.budget)
+                fitness = fitness.astype(np.result_type(fitness, new_fitness))
+                fitness[new] = new_fitness
+
+            # Sort population by fitness ascending, stable as per list sort
+            order = np.argsort(fitness, kind='stable')
+            population = population[order]
+            fitness = fitness[order]
+
+            if fitness[0] < self.hj.rbest.fitness:
+                lg.msg(logging.DEBUG, 'Previous best is {}, now updated with new best {}'.format(
+                    self.hj.rbest.fitness, fitness[0]))
+                self.hj.rbest.fitness = fitness[0].item()
+                self.hj.rbest.candidate = population[0].tolist()
+                self.hj.rft.record(self.hj.budget_total - self.hj.budget, self.hj.rbest.fitness)
+                if not self.fromhyper:
+                    self.hj.iter_last_imp[self.hj.run] = self.hj.budget_total - self.hj.budget
+                    self.hj.imp_count[self.hj.run] += 1
+
+            self.parents = self.parent_selection_vectorized(fitness)
+            if not self.parents:  # Convergence
+                break
+
+            parent0 = population[self.parents[0]].tolist()
+            parent1 = population[self.parents[1]].tolist()
+            self.children = self.hj.crossover_batch(parent0, parent1, self.hj.number_children)
+
+            # Only mutate if parents too similar, genes of a chromosome match when all their bits do
+            similar = population[self.parents[0]] == population[self.parents[1]]
+            if chromosome:
+                similar = similar.all(axis=-1)
+            if np.count_nonzero(similar) > population.shape[1] * self.hj.parent_gene_similarity_threshold:
+                self.children, moves = map(list, zip(*[self.hj.variator(c) for c in self.children]))
+                self.hj.budget -= sum(move.cost for move in moves)
+
+            # Parents retain their fitness, children are scored next generation
+            population = np.concatenate((population[self.parents], np.array(self.children, dtype=population.dtype)))
+            fitness = np.concatenate((fitness[self.parents], np.full(len(self.children), fitness_default)))
+            self.charge_generation(budget)
+
+        # Persist final population, e.g. for migration
+        self.hj.population = []
+        for candidate, f in zip(population.tolist(), fitness.tolist()):
+            c = Particle()
+            c.candidate = candidate
+            if f != fitness_default:
+                c.fitness = f
+            self.hj.population.append(c)
+        self.save_state(population=self.hj.population)
+
+    def charge_generation(self, budget):
+        # Generation of cached children only, served uncharged, still costs an evaluation so the run terminates
+        if self.hj.budget == budget:
+            self.hj.budget -= 1
+
+    def inject_incumbent_particle(self, population):
+        # Worst of population, unscored candidates first, replaced by the incumbent run best if better
+        worst = max(range(len(population)), key=lambda ci: population[ci].fitness)
+        if self.hj.rbest.fitness < population[worst].fitness:
+            population[worst] = copy.deepcopy(self.hj.rbest)
+        return population
 
     def parent_selection(self):
         # Stochastic Universal Sampling
@@ -95,14 +221,38 @@ class GA(Optimizer):
 
         return parents
 
-    def parent_crossover(self):
-        children = []
-        for i in range(self.hj.number_children):
-            child = self.hj.crossover(self.hj.population[self.parents[0]].candidate,
-                                      self.hj.population[self.parents[1]].candidate)
-            children.append(child)
+    def parent_selection_vectorized(self, fitness):
+        """
+        Stochastic Universal Sampling as per parent_selection, where the n-th parent is the first candidate after the
+        previous parent whose aggregated fitness proportion falls strictly between pointers, beyond pointer n-1. Found
+        with searchsorted as aggregated proportions ascend, fitness being non-negative for every problem
+        """
+        fitness_aggr = np.cumsum(fitness)
+        max_fitness = fitness_aggr[-1]
+        if max_fitness == 0:
+            return []
+
+        # Fitness proportionate where smaller fitness is better
+        fitness_aggr = np.cumsum(((max_fitness - fitness) / max_fitness) / (len(fitness) - 1))
 
-        return children
+        pointer_distance = 1 / self.hj.number_parents
+        start_point = self.random.uniform(0, pointer_distance)
+        points = start_point + np.arange(self.hj.number_parents) * pointer_distance
+
+        # Candidates within bounds and off pointers, then the first beyond each parent's lower pointer
+        eligible = np.flatnonzero((fitness_aggr < 1) & ~np.isin(fitness_aggr, points))
+        lower = np.concatenate(([0], points[:-1]))
+        first = np.searchsorted(eligible, np.searchsorted(fitness_aggr, lower, side='right'))
+
+        # Each parent follows the previous one, i.e. b[i] = max(first[i], b[i-1] + 1)
+        steps = np.arange(self.hj.number_parents)
+        first = steps + np.maximum.accumulate(first - steps)
+        return eligible[first[first < len(eligible)]].tolist()
+
+    def parent_crossover(self):
+        # All children from the parent pair in one call
+        return self.hj.crossover_batch(self.hj.population[self.parents[0]].candidate,
+                                       self.hj.population[self.parents[1]].candidate, self.hj.number_children)
 
     def children_mutate(self):
         # Only mutate if parents too similar i.e. match genes retaining order significance
@@ -113,7 +263,8 @@ class GA(Optimizer):
         if len(parent_gene_similarity_index) > (len(self.hj.population[self.parents[0]].candidate) *
                                                 self.hj.parent_gene_similarity_threshold):
             for i in range(self.hj.number_children):
-                self.children[i] = self.hj.variator(self.children[i])
+                self.children[i], move = self.hj.variator(self.children[i])
+                self.hj.budget -= move.cost
 
     def update_population(self):
         new_pop = []
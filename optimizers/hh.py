@@ -1,5 +1,6 @@
 from optimizers.hyper import Hyper
 import logging
+import math
 from utilities import logger as lg
 
 
@@ -8,16 +9,22 @@ class HH(Hyper):
         Hyper.__init__(self, **kwargs)
 
     def optimize(self):
-        self.hj.decay = self.decay  # Restore decay start-point to original configuration
+        if not self.resumed:
+            self.hj.decay = self.decay  # Restore decay start-point to original configuration
         self.hyper()
 
     def hyper(self):
-        self.set_llh_samples()
-        self.add_samples_to_trend()
-        bcf, bc, llh = self.select_heuristic()
-        self.set_rbest(bcf, bc)
+        if not self.resumed:
+            self.set_llh_samples()
+            bcf, bc, llh = self.select_heuristic()
+            self.set_rbest(bcf, bc)
 
         while self.hj.budget > 0:
+            self.checkpoint()
+            if self.pool is not None and self.hj.llh_speculative > 1:
+                self.speculate()
+                continue
+
             bcf, bc, llh = self.select_heuristic()
             lg.msg(logging.DEBUG, 'Low level component {} seeding Hyper with best fitness {} and candidate {}'.format(
                 self.low_level_heuristics[llh].oid, bcf, bc))
@@ -35,17 +42,43 @@ class HH(Hyper):
             self.low_level_heuristics[llh].llh_oid_run_count += 1
 
             self.hj.budget = int(self.hj.budget - self.hj.llh_budget)
+            self.update_from_llh(llh)
+
+    def speculate(self):
+        """
+        Select and run llh_speculative low-level heuristics at once on workers, all seeded from the current pool. Each
+        is charged and merged in order of selection, as if run one after another
+        """
+        runs = self.hj.llh_speculative
+        if self.hj.llh_budget > 0:
+            runs = min(runs, math.ceil(self.hj.budget / self.hj.llh_budget))  # No more runs than the budget allows
+
+        selected = [self.select_heuristic() for _ in range(runs)]
+        pop = self.set_pop()
+        futures = [self.submit_llh(llh, 1, self.hj.llh_budget, rbest=(bcf, bc), population=pop)
+                   for bcf, bc, llh in selected]
+
+        for (bcf, bc, llh), future in zip(selected, futures):
+            lg.msg(logging.DEBUG, 'Low level component {} seeding Hyper with best fitness {} and candidate {}'.format(
+                self.low_level_heuristics[llh].oid, bcf, bc))
+            self.set_rbest(bcf, bc)
+            self.merge_llh(llh, future)
+            self.low_level_heuristics[llh].llh_oid_run_count += 1
+
+            self.hj.budget = int(self.hj.budget - self.hj.llh_budget)
+            self.update_from_llh(llh)
 
-            if self.low_level_heuristics[llh].rbest.fitness < self.hj.rbest.fitness:
-                lg.msg(logging.INFO, 'Inserting fitness into archive {} by heuristic {}'.format(
-                    self.low_level_heuristics[llh].rbest.fitness, self.low_level_heuristics[llh].oid))
-                self.low_level_heuristics[llh].llh_oid_aggr_imp += (self.hj.rbest.fitness - self.low_level_heuristics[llh].rbest.fitness)
-                self.llh_fitness[llh].insert(0, self.low_level_heuristics[llh].rbest.fitness)  # Insert at start
-                self.llh_candidates[llh].insert(0, self.low_level_heuristics[llh].rbest.candidate)
-                self.hj.rft.append(self.low_level_heuristics[llh].rbest.fitness)
-                self.set_rbest(self.low_level_heuristics[llh].rbest.fitness, self.low_level_heuristics[llh].rbest.candidate)
-                self.hj.iter_last_imp[self.hj.run] = self.hj.budget_total - self.hj.budget
-                self.hj.imp_count[self.hj.run] += 1
+    def update_from_llh(self, llh):
+        if self.low_level_heuristics[llh].rbest.fitness < self.hj.rbest.fitness:
+            lg.msg(logging.INFO, 'Inserting fitness into archive {} by heuristic {}'.format(
+                self.low_level_heuristics[llh].rbest.fitness, self.low_level_heuristics[llh].oid))
+            self.low_level_heuristics[llh].llh_oid_aggr_imp += (self.hj.rbest.fitness - self.low_level_heuristics[llh].rbest.fitness)
+            self.add_to_archive(llh, self.low_level_heuristics[llh].rbest.fitness,
+                                self.low_level_heuristics[llh].rbest.candidate)
+            self.hj.rft.record(self.hj.budget_total - self.hj.budget, self.low_level_heuristics[llh].rbest.fitness)
+            self.set_rbest(self.low_level_heuristics[llh].rbest.fitness, self.low_level_heuristics[llh].rbest.candidate)
+            self.hj.iter_last_imp[self.hj.run] = self.hj.budget_total - self.hj.budget
+            self.hj.imp_count[self.hj.run] += 1
 
     def select_heuristic(self):
         bcf, bc, llh = self.best_candidate_from_pool()
@@ -53,9 +86,7 @@ class HH(Hyper):
         if self.llh_total > 1 and self.hj.decay > self.random.random():
             choice = [i for i in range(0, self.llh_total) if i != llh]  # Exclude best
             llh = self.random.choice(choice)
-            random_llh_best = min((v, c) for c, v in enumerate(self.llh_fitness[llh]))
-            bcf = random_llh_best[0]
-            bc = self.llh_candidates[llh][random_llh_best[1]]
+            bcf, bc, _ = self.llh_archives[llh].best
 
         self.hj.decay *= self.hj.decay_coeff
         return bcf, bc, llh
@@ -2,7 +2,12 @@ from optimizers.optimizer import Optimizer
 from optimizers.particle import Particle
 import logging
 from utilities import logger as lg
+from utilities.elite_archive import EliteArchive
+from utilities.checkpoint import Checkpoint
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import collections
+import pickle
 
 
 class Hyper(Optimizer):
@@ -10,61 +15,111 @@ class Hyper(Optimizer):
         Optimizer.__init__(self, **kwargs)
         self.low_level_heuristics = collections.OrderedDict()
         self.llh_total = len(self.hj.low_level_selection_pool)
-        self.llh_fitness = []
-        self.llh_candidates = []
+        self.llh_archives = []  # Elite archive of each low-level heuristic
+        self.archive = None  # Elite archive across all low-level heuristics
         self.llh_exec = []
         self.jobs = []
         self.decay = self.hj.decay
+        self.pool = None  # Worker processes running low-level heuristics, if any
+
+    def __getstate__(self):
+        # Worker processes are not part of the search state, so a checkpointed run starts its own on resuming
+        state = vars(self).copy()
+        state['pool'] = None
+        return state
 
     def pre_processing(self, **kwargs):
         Optimizer.pre_processing(self, **kwargs)
+        if self.hj.llh_workers > 0:
+            self.pool = ProcessPoolExecutor(max_workers=self.hj.llh_workers)
+        if self.resumed:
+            return
         self.jobs = kwargs['jobs']
         self.import_low_level_heuristics()
-        self.llh_fitness = [[] for _ in range(self.llh_total)]
-        self.llh_candidates = [[] for _ in range(self.llh_total)]
+        self.llh_archives = [EliteArchive(size=self.hj.llh_archive_size) for _ in range(self.llh_total)]
+        self.archive = EliteArchive(size=self.hj.llh_archive_size)
         self.llh_exec = [[] for _ in range(self.llh_total)]
 
     def post_processing(self, **kwargs):
         Optimizer.post_processing(self, **kwargs)
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
         lg.msg(logging.INFO, 'Hyper heuristic finished with best of {}'.format(self.hj.rbest.fitness))
         for k, v in self.low_level_heuristics.items():
             lg.msg(logging.INFO, 'Low-level heuristic {} executed {} times with aggregated improvements of {}'.format(
                 v.oid, v.llh_oid_run_count, v.llh_oid_aggr_imp))
+            v.warm_start = False
+            v.oid_cls.state = None
+
+    def checkpoint(self):
+        # State of the run between low-level heuristic invocations, where it is entirely held by jobs
+        if not self.fromhyper:
+            Checkpoint.save_inflight(self.hj, self.jobs)
 
     def best_candidate_from_pool(self):
-        best = min((min((v, c) for c, v in enumerate(row)), r) for r, row in enumerate(self.llh_fitness))
-        bcf = self.llh_fitness[best[1]][best[0][1]]
-        bc = self.llh_candidates[best[1]][best[0][1]]
-        bcllh = best[1]
+        bcf, bc, bcllh = self.archive.best
         return bcf, bc, bcllh
 
+    def add_to_archive(self, llh, fitness, candidate):
+        self.llh_archives[llh].add(fitness, candidate, llh)
+        self.archive.add(fitness, candidate, llh)
+
     def set_rbest(self, bcf, bc):
         self.hj.rbest.fitness = bcf
         self.hj.rbest.candidate = bc
 
     def set_llh_samples(self):
+        if self.pool is not None:
+            self.set_llh_samples_parallel()
+            return
+
         # Initialise starting samples
         for k, v in self.low_level_heuristics.items():
             for i in range(self.hj.llh_sample_runs):
                 v.budget = self.hj.llh_sample_budget
-                if v.initial_sample:
-                    v.pid_cls.initial_sample = v.pid_cls.generate_initial_sample()
                 v.oid_cls.run(fromhyper=True)
                 self.hj.budget -= self.hj.llh_sample_budget
                 self.hj.budget += v.budget  # Credit any early termination or debit any budget overrun
-                self.llh_fitness[k].append(v.rbest.fitness)  # Insert at start
-                self.llh_candidates[k].append(v.rbest.candidate)
+                self.add_to_archive(k, v.rbest.fitness, v.rbest.candidate)
+                self.hj.rft.record(self.hj.budget_total - self.hj.budget, v.rbest.fitness)
+
+    def set_llh_samples_parallel(self):
+        # Sample runs of each low-level heuristic in turn on a worker, low-level heuristics in parallel
+        futures = [self.submit_llh(k, self.hj.llh_sample_runs, self.hj.llh_sample_budget)
+                   for k in self.low_level_heuristics]
+
+        # Merged in low-level heuristic order, so archive and budget are as when sampled one after another
+        for k, future in zip(self.low_level_heuristics, futures):
+            results = self.merge_llh(k, future)
+            for fitness, candidate, budget in results:
+                self.hj.budget -= self.hj.llh_sample_budget
+                self.hj.budget += budget  # Credit any early termination or debit any budget overrun
+                self.add_to_archive(k, fitness, candidate)
+                self.hj.rft.record(self.hj.budget_total - self.hj.budget, fitness)
+
+    def submit_llh(self, llh, runs, budget, rbest=None, population=None):
+        """
+        Future of runs of a low-level heuristic on a worker, on a copy of its job with its own random stream
+        """
+        # Job pickled here rather than when dispatched, as merged results of earlier runs may change it meanwhile
+        job = pickle.dumps(self.low_level_heuristics[llh])
+        return self.pool.submit(run_low_level_heuristic, job, self.random.getrandbits(64), runs, budget, rbest,
+                                population)
 
-    def add_samples_to_trend(self):
-        self.hj.rft = [y for x in self.llh_fitness for y in x]
-        self.hj.rft.sort(reverse=True)
+    def merge_llh(self, llh, future):
+        # Persist low-level heuristic state left by a worker, e.g. SA initial temperature, returning its run results
+        results, state = future.result()
+        v = self.low_level_heuristics[llh]
+        vars(v.oid_cls).update(state)
+        v.rbest = Particle()
+        v.rbest.fitness, v.rbest.candidate, v.budget = results[-1]
+        return results
 
     def set_pop(self):
-        candidates = list(zip([y for x in self.llh_fitness for y in x], [y for x in self.llh_candidates for y in x]))
-        candidates.sort(key=lambda x: x[0])
         population = []
 
-        for fitness, candidate in candidates[:1]:
+        for fitness, candidate, _ in [self.archive.best]:
             c = Particle()
             c.fitness = fitness
             c.candidate = candidate
@@ -74,6 +129,33 @@ class Hyper(Optimizer):
     def import_low_level_heuristics(self):
         for hci, hc in enumerate(self.hj.low_level_selection_pool):
             component = [x for x in self.jobs if x.pid == self.hj.pid and x.oid == hc][0]
+            component.run = self.hj.run  # Low-level heuristics run as part of the run of the hyper-heuristic
             component.llh_oid_run_count = 0
             component.llh_oid_aggr_imp = 0
+            component.pid_cls.clear_fitness_cache()
+            component.warm_start = self.hj.llh_warm_start
+            component.oid_cls.state = None  # Each run of the hyper-heuristic starts its low-level heuristics afresh
             self.low_level_heuristics[hci] = component
+
+
+def run_low_level_heuristic(job, seed, runs, budget, rbest=None, population=None):
+    """
+    Runs of a low-level heuristic job in a worker process, each with the given budget and continuing from the last,
+    returning the (fitness, candidate, budget remaining) of each run and the state of its optimizer
+    """
+    job = pickle.loads(job)
+    job.oid_cls.random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+    if rbest is not None:
+        job.rbest.fitness, job.rbest.candidate = rbest
+    if population is not None:
+        job.population = population
+
+    results = []
+    for _ in range(runs):
+        job.budget = budget
+        job.oid_cls.run(fromhyper=True)
+        results.append((job.rbest.fitness, job.rbest.candidate, job.budget))
+
+    state = {k: v for k, v in vars(job.oid_cls).items() if k not in ('hj', 'random')}
+    return results, state
@@ -16,29 +16,23 @@ class InspyredWrapper:
 
     @staticmethod
     def evaluator(candidates, args):
-        fitness = []
+        batch = []
         for c in candidates:
             if isinstance(c[0], float) and args['slf'].hj.pid_type == 'combinatorial':
                 c = args['slf'].hj.pid_cls.candidate_spv_continuous_to_discrete(c)
-            f, _ = args['slf'].hj.pid_cls.evaluator(c)
-            fitness.append(f)
-            args['slf'].hj.budget -= 1
-        return fitness
+            batch.append(c)
+        fitness, args['slf'].hj.budget = args['slf'].hj.pid_cls.evaluate_batch(batch, args['slf'].hj.budget)
+        return fitness.tolist()
 
     @staticmethod
     def observer(population, num_generations, num_evaluations, args):
-        if args['slf'].hj.oid_cls.__class__.__name__ == 'DEA':
-            ft = [o.fitness for o in population]
-            args['slf'].hj.rft.extend(ft)
-        else:
-            # Persist best fitness as population evolves. Note use of max is correct irrespective of max or min problem,
-            # as Inspyred knows which type of problem the heuristic is instantiated with
-            best = max(population)
-            args['slf'].hj.rft.append(round(best.fitness, 2))
+        # Persist best fitness as population evolves. Note use of max is correct irrespective of max or min problem,
+        # as Inspyred knows which type of problem the heuristic is instantiated with
+        best = max(population)
+        args['slf'].hj.rft.record(args['slf'].hj.budget_total - args['slf'].hj.budget, best.fitness)
 
-        args['slf'].hj.rft.sort()
-        if args['slf'].hj.rft[0] < args['slf'].hj.rbest.fitness:
-            args['slf'].hj.rbest.fitness = args['slf'].hj.rft[0]
+        if best.fitness < args['slf'].hj.rbest.fitness:
+            args['slf'].hj.rbest.fitness = best.fitness
             if not args['slf'].fromhyper:
                 args['slf'].hj.iter_last_imp[args['slf'].hj.run] = args['slf'].hj.budget_total - args['slf'].hj.budget
                 args['slf'].hj.imp_count[args['slf'].hj.run] += 1
@@ -1,9 +1,16 @@
+from utilities.checkpoint import Checkpoint
+import numpy as np
+
+
 class Optimizer:
     def __init__(self, **kwargs):
         # Persist current configuration and problem
         self.random = kwargs['random']
         self.hj = kwargs['hopjob']
         self.fromhyper = False
+        self.state = None  # Search state kept between runs when warm started
+        self.resumed = False  # Run continues from its checkpointed state
+        self.inflight = None  # State of the main loop of a run in flight, whilst checkpointed
 
     def run(self, **kwargs):
         self.pre_processing(**kwargs)
@@ -16,6 +23,116 @@ class Optimizer:
         else:
             return self.hj.generator_cont
 
+    def positions_to_candidates(self, positions):
+        if self.hj.pid_type == 'combinatorial':
+            # Transform candidates of cont values back to discrete using smallest position value method
+            return self.hj.pid_cls.candidates_spv_continuous_to_discrete(positions)
+        return positions
+
+    def position_bounds(self):
+        # Domain of continuous positions, optimizer bounds when mapped to permutations by smallest position value
+        if self.hj.pid_type == 'combinatorial':
+            return self.hj.oid_lb, self.hj.oid_ub
+        return self.hj.pid_lb, self.hj.pid_ub
+
+    def initial_positions(self, rng, lb, ub):
+        """
+        (pop, n) positions of any incoming migrant population, completed with positions drawn uniformly within bounds
+        """
+        migrants = self.hj.population[:self.hj.initial_pop_size]
+        positions = [self.candidate_position(c.candidate, lb, ub) for c in migrants]
+        self.hj.population = []
+
+        n = self.hj.pid_cls.n
+        generated = lb + (ub - lb) * rng.random((self.hj.initial_pop_size - len(positions), n))
+        return np.concatenate((np.array(positions, dtype=np.float64).reshape(-1, n), generated))
+
+    def candidate_position(self, candidate, lb, ub):
+        # Continuous position of a candidate from any optimizer
+        if self.hj.pid_type == 'combinatorial':
+            return self.hj.pid_cls.candidate_spv_discrete_to_continuous(candidate, lb, ub)
+        elif isinstance(candidate[0], list):  # Binary chromosome, e.g. from GA
+            return self.binary_to_float(candidate)
+        return list(candidate)
+
+    def warm_state(self):
+        """
+        Search state saved by the previous run when warm started, e.g. as a low-level heuristic invoked repeatedly by a
+        hyper-heuristic, otherwise None. A warm run continues from it with the incumbent run best injected, so any
+        incoming population is dropped
+        """
+        if not self.hj.warm_start or self.state is None:
+            return None
+        self.hj.population = []
+        return self.state
+
+    def save_state(self, **state):
+        if self.hj.warm_start:
+            self.state = state
+
+    def checkpoint(self, **state):
+        """
+        Checkpoint run in flight if due, with the state of its main loop at the start of an iteration, from which a
+        resumed run continues. A low-level heuristic is part of the state of its hyper-heuristic, so isn't checkpointed
+        """
+        if self.fromhyper or not Checkpoint.due(self.hj):
+            return
+        self.inflight = state
+        Checkpoint.save_inflight(self.hj, [])
+        self.inflight = None
+
+    def resume_state(self):
+        """
+        State of the main loop checkpointed in flight when resuming a run, otherwise None
+        """
+        if not self.resumed:
+            return None
+        self.resumed = False
+        state, self.inflight = self.inflight, None
+        return state
+
+    def inject_incumbent(self, positions, fitness, lb, ub):
+        """
+        Replace the worst of positions by the incumbent run best if better, returning its row, otherwise None
+        """
+        if not len(fitness):
+            return None
+        worst = int(np.argmax(fitness))
+        if not self.hj.rbest.fitness < fitness[worst]:
+            return None
+        positions[worst] = self.candidate_position(self.hj.rbest.candidate, lb, ub)
+        fitness[worst] = self.hj.rbest.fitness
+        return worst
+
+    def evaluate_positions(self, positions):
+        """
+        Candidates and fitness of positions scored as one batch, truncated to the remaining budget
+        """
+        candidates = self.positions_to_candidates(positions[:max(min(len(positions), int(self.hj.budget)), 0)])
+        fitness, self.hj.budget = self.hj.pid_cls.evaluate_batch(candidates, self.hj.budget)
+        return candidates, fitness
+
+    def update_rbest(self, candidates, fitness):
+        # Run best from best of a batch of candidates
+        if not len(fitness):
+            return
+        best = int(np.argmin(fitness))
+        if fitness[best] < self.hj.rbest.fitness:
+            self.hj.rbest.candidate = candidates[best].tolist()
+            self.hj.rbest.fitness = fitness[best].item()
+            self.hj.rft.record(self.hj.budget_total - self.hj.budget, self.hj.rbest.fitness)
+            if not self.fromhyper:
+                self.hj.iter_last_imp[self.hj.run] = self.hj.budget_total - self.hj.budget
+                self.hj.imp_count[self.hj.run] += 1
+
+    def random_batch(self, size):
+        """
+        Array of size values identical to as many successive self.random.random() calls, drawn in bulk from the same
+        Mersenne Twister stream, taking two 32-bit words per value as random.random() does
+        """
+        words = np.frombuffer(self.random.getrandbits(64 * size).to_bytes(8 * size, 'little'), dtype='<u4')
+        return ((words[0::2] >> 5) * 67108864.0 + (words[1::2] >> 6)) * (1.0 / 9007199254740992.0)
+
     def binary_to_float(self, binary):
         # Transform bit string to float
         float_vals = []
@@ -27,8 +144,15 @@ class Optimizer:
             float_vals.append(fv)
         return float_vals
 
+    def binary_to_float_batch(self, chromosomes):
+        # Transform (k, n, bits) bit matrix to (k, n) floats as one product with powers of two, rescaled as above
+        powers = 2.0 ** np.arange(self.hj.bit_computing - 1, -1, -1)
+        float_vals = np.asarray(chromosomes) @ powers
+        return float_vals / (2 ** self.hj.bit_computing - 1) * (self.hj.pid_ub - self.hj.pid_lb) + self.hj.pid_lb
+
     def pre_processing(self, **kwargs):
         self.fromhyper = kwargs['fromhyper']
+        self.resumed = kwargs.get('resume', False)
 
     def post_processing(self, **kwargs):
         pass
@@ -1,5 +1,6 @@
 from optimizers.optimizer import Optimizer
 from optimizers.particle import Particle
+import numpy as np
 import copy
 from operator import attrgetter
 
@@ -16,35 +17,59 @@ class PSO(Optimizer):
         self.velocity_max = self.hj.oid_ub
 
     def optimize(self):
-        self.swarm()
-
-    def swarm(self):
-        # Incoming population migrates to starting population, reset continuous permutation values
-        if self.hj.population:
-            self.reset_inherited_population_attr()
-
-        # Complete assembly of initial population size, accounting for any incoming migrant population
-        for i in range(self.hj.initial_pop_size - len(self.hj.population)):
-            new_c = Particle()
+        if self.hj.vectorized:
+            self.swarm_vectorized()
+        else:
+            self.swarm()
+
+    def initial_swarm(self):
+        state = self.warm_state()
+        if state:
+            self.hj.population, self.prev_swarm, self.gbest_swarm = (state['population'], state['prev_swarm'],
+                                                                     state['gbest_swarm'])
+
+            # Incumbent replaces the worst particle, at rest and as its own personal best
+            worst = max(range(len(self.hj.population)), key=lambda ci: self.hj.population[ci].fitness)
+            if self.hj.rbest.fitness < self.hj.population[worst].fitness:
+                incumbent = copy.deepcopy(self.hj.rbest)
+                incumbent.candidate_cont = self.candidate_position(incumbent.candidate, self.hj.pid_lb, self.hj.pid_ub)
+                self.hj.population[worst] = incumbent
+                self.prev_swarm[worst] = copy.deepcopy(incumbent)
+                self.gbest_swarm[worst] = copy.deepcopy(incumbent)
+        else:
+            # Incoming population migrates to starting population, reset continuous permutation values
+            if self.hj.population:
+                self.reset_inherited_population_attr()
+
+            # Complete assembly of initial population size, accounting for any incoming migrant population
+            for i in range(self.hj.initial_pop_size - len(self.hj.population)):
+                new_c = Particle()
             
-            # Generate candidate of cont values within domain bounds
-            new_c.candidate_cont = self.get_generator()(lb=self.hj.oid_lb, ub=self.hj.oid_ub)
+                # Generate candidate of cont values within domain bounds
+                new_c.candidate_cont = self.get_generator()(lb=self.hj.oid_lb, ub=self.hj.oid_ub)
 
-            if self.hj.pid_type == 'combinatorial':
-                # Transform candidate of cont values back to discrete using smallest position value method
-                new_c.candidate = self.hj.pid_cls.candidate_spv_continuous_to_discrete(new_c.candidate_cont)
-            else:
-                new_c.candidate = new_c.candidate_cont
+                if self.hj.pid_type == 'combinatorial':
+                    # Transform candidate of cont values back to discrete using smallest position value method
+                    new_c.candidate = self.hj.pid_cls.candidate_spv_continuous_to_discrete(new_c.candidate_cont)
+                else:
+                    new_c.candidate = new_c.candidate_cont
 
-            new_c.fitness, self.hj.budget = self.hj.pid_cls.evaluator(new_c.candidate, self.hj.budget)
+                new_c.fitness, self.hj.budget = self.hj.pid_cls.evaluator(new_c.candidate, self.hj.budget)
             
-            self.hj.population.append(new_c)
+                self.hj.population.append(new_c)
+
+            self.gbest_swarm = copy.deepcopy(self.hj.population)
+            self.prev_swarm = copy.deepcopy(self.hj.population)
 
-        self.gbest_swarm = copy.deepcopy(self.hj.population)
-        self.prev_swarm = copy.deepcopy(self.hj.population)
         self.set_rbest(min(self.hj.population, key=attrgetter('fitness')))
 
+    def swarm(self):
+        # Resumed run continues from its checkpointed swarm and run best, held by the job and optimizer
+        if self.resume_state() is None:
+            self.initial_swarm()
+
         while self.hj.budget > 0:
+            self.checkpoint()
             new_swarm = self.swarm_in_motion()
             self.prev_swarm = copy.deepcopy(self.hj.population)
             self.hj.population = copy.deepcopy(new_swarm)
@@ -56,11 +81,115 @@ class PSO(Optimizer):
                     self.gbest_swarm[ci] = copy.deepcopy(c)
                 if c.fitness < self.hj.rbest.fitness:
                     self.set_rbest(c)
-                    self.hj.rft.append(c.fitness)
+                    self.hj.rft.record(self.hj.budget_total - self.hj.budget, c.fitness)
                     if not self.fromhyper:
                         self.hj.iter_last_imp[self.hj.run] = self.hj.budget_total - self.hj.budget
                         self.hj.imp_count[self.hj.run] += 1
 
+        self.save_state(population=self.hj.population, prev_swarm=self.prev_swarm, gbest_swarm=self.gbest_swarm)
+
+    def swarm_vectorized(self):
+        """
+        Swarm held as (pop, n) arrays of positions, previous positions and personal bests, each moved and scored as a
+        whole. Random draws and arithmetic follow swarm, so fitness trajectories match for the same seed
+        """
+        # Resumed run continues from its checkpointed swarm
+        inflight = self.resume_state()
+        state = self.warm_state() if inflight is None else None
+        if inflight is not None:
+            positions, prev_positions = inflight['positions'], inflight['prev_positions']
+            pbest_positions, pbest_fitness = inflight['pbest_positions'], inflight['pbest_fitness']
+            candidates, fitness = inflight['candidates'], inflight['fitness']
+            rbest_position = inflight['rbest_position']
+        elif state:
+            positions, prev_positions = state['positions'], state['prev_positions']
+            pbest_positions, pbest_fitness = state['pbest_positions'], state['pbest_fitness']
+            candidates, fitness = state['candidates'], state['fitness']
+
+            # Incumbent replaces the worst particle, at rest and as its own personal best
+            ci = self.inject_incumbent(positions, fitness, self.hj.pid_lb, self.hj.pid_ub)
+            if ci is not None:
+                candidates[ci] = copy.deepcopy(self.hj.rbest.candidate)
+                prev_positions[ci] = pbest_positions[ci] = positions[ci]
+                pbest_fitness[ci] = fitness[ci]
+        else:
+            # Incoming population migrates to starting population, reset continuous permutation values
+            if self.hj.population:
+                self.reset_inherited_population_attr()
+
+            # Complete assembly of initial population size, accounting for any incoming migrant population
+            migrants = len(self.hj.population)
+            positions = [c.candidate_cont for c in self.hj.population]
+            for i in range(self.hj.initial_pop_size - migrants):
+                positions.append(self.get_generator()(lb=self.hj.oid_lb, ub=self.hj.oid_ub))
+            positions = np.array(positions, dtype=np.float64)
+
+            # Migrants retain their own candidate and fitness, new particles are scored as one batch
+            candidates = self.positions_to_candidates(positions[migrants:])
+            fitness, self.hj.budget = self.hj.pid_cls.evaluate_batch(candidates, self.hj.budget)
+            candidates = [c.candidate for c in self.hj.population] + candidates.tolist()
+            fitness = np.array([c.fitness for c in self.hj.population] + fitness.tolist())
+
+            prev_positions = positions.copy()
+            pbest_positions = positions.copy()
+            pbest_fitness = fitness.copy()
+
+        if inflight is None:
+            best = int(np.argmin(fitness))
+            self.set_rbest_from_swarm(positions[best], candidates[best], fitness[best])
+            rbest_position = positions[best].copy()
+
+        while self.hj.budget > 0:
+            self.checkpoint(positions=positions, prev_positions=prev_positions, pbest_positions=pbest_positions,
+                            pbest_fitness=pbest_fitness, candidates=candidates, fitness=fitness,
+                            rbest_position=rbest_position)
+            # Local and global coefficients drawn per coordinate in the order of swarm_in_motion
+            r = self.random_batch(2 * positions.size).reshape(positions.shape + (2,))
+            new_positions = (positions + self.hj.inertia_coeff * (positions - prev_positions) +
+                             self.hj.local_coeff * r[..., 0] * (pbest_positions - positions) +
+                             self.hj.global_coeff * r[..., 1] * (rbest_position - positions))
+            if self.hj.pid_type != 'combinatorial':
+                new_positions = np.clip(new_positions, self.hj.pid_lb, self.hj.pid_ub)
+            prev_positions = positions
+            positions = new_positions
+
+            # Evaluate swarm fitness and set personal (local) best
+            budget = self.hj.budget
+            candidates = self.positions_to_candidates(positions)
+            fitness, self.hj.budget = self.hj.pid_cls.evaluate_batch(candidates, self.hj.budget)
+            improved = fitness < pbest_fitness
+            pbest_positions[improved] = positions[improved]
+            pbest_fitness[improved] = fitness[improved]
+
+            # Run best improvements in particle order, as when evaluating one particle at a time
+            best_before = np.minimum.accumulate(np.concatenate(([self.hj.rbest.fitness], fitness[:-1])))
+            for ci in np.flatnonzero(fitness < best_before).tolist():
+                self.set_rbest_from_swarm(positions[ci], candidates[ci], fitness[ci])
+                rbest_position = positions[ci].copy()
+                self.hj.rft.record(self.hj.budget_total - (budget - ci - 1), self.hj.rbest.fitness)
+                if not self.fromhyper:
+                    self.hj.iter_last_imp[self.hj.run] = self.hj.budget_total - (budget - ci - 1)
+                    self.hj.imp_count[self.hj.run] += 1
+
+        # Persist final swarm as population, e.g. for migration
+        self.hj.population = []
+        if isinstance(candidates, np.ndarray):
+            candidates = candidates.tolist()
+        self.save_state(positions=positions, prev_positions=prev_positions, pbest_positions=pbest_positions,
+                        pbest_fitness=pbest_fitness, candidates=candidates, fitness=fitness)
+        for position, candidate, f in zip(positions.tolist(), candidates, fitness.tolist()):
+            c = Particle()
+            c.candidate_cont = position
+            c.candidate = candidate
+            c.fitness = f
+            self.hj.population.append(c)
+
+    def set_rbest_from_swarm(self, position, candidate, fitness):
+        self.hj.rbest = Particle()
+        self.hj.rbest.candidate_cont = position.tolist()
+        self.hj.rbest.candidate = candidate.tolist() if isinstance(candidate, np.ndarray) else copy.deepcopy(candidate)
+        self.hj.rbest.fitness = fitness.item()
+
     def set_rbest(self, candidate):
         self.hj.rbest = copy.deepcopy(candidate)
 
@@ -2,9 +2,12 @@ from optimizers.optimizer import Optimizer
 from optimizers.particle import Particle
 import logging
 from utilities import logger as lg
+from utilities.reservoir import Reservoir
+from problems.instance_registry import InstanceRegistry
 import numpy as np
 import math
 import copy
+import zlib
 
 
 class SA(Optimizer):
@@ -24,14 +27,22 @@ class SA(Optimizer):
 
     def optimize(self):
         if self.initial_temp == 0:
-            self.hj.pid_cls.initial_sample = self.hj.pid_cls.generate_initial_sample()
             self.initial_temp = self.set_initial_temp()
 
+            # Low-level heuristic is charged before annealing, capped at the budget it was given, so it never overruns
+            # the budget of its hyper-heuristic
+            if self.fromhyper:
+                self.hj.budget -= min(self.initial_temp_cost, max(self.hj.budget, 0))
+                self.initial_temp_cost = 0
+
         lg.msg(logging.DEBUG, 'Initial temperature set to {}'.format(self.initial_temp))
-        self.anneal()
-        # Evaluating initial temperature has a one-time computational cost, so reduce budget if required
+        if self.hj.chains > 1:
+            self.anneal_chains()
+        else:
+            self.anneal()
+        # Evaluating initial temperature has a one-time computational cost, charged to a standalone run once annealed
         if self.initial_temp_cost != 0:
-            self.hj.budget += self.initial_temp_cost
+            self.hj.budget -= self.initial_temp_cost
             self.initial_temp_cost = 0
 
     def anneal(self):
@@ -40,47 +51,199 @@ class SA(Optimizer):
             self.hj.rbest.candidate = self.get_generator()(lb=self.hj.pid_lb, ub=self.hj.pid_ub)
             self.hj.rbest.fitness, self.hj.budget = self.hj.pid_cls.evaluator(self.hj.rbest.candidate, self.hj.budget)
 
-        self.temp = self.initial_temp
+        # Moves applied in place to a candidate owned by this run, undone on rejection
+        inplace = self.hj.inplace and self.hj.pid_type != 'continuous'
+        if inplace:
+            self.hj.rbest.candidate = list(self.hj.rbest.candidate)
+
+        # Neighbours are evaluated incrementally from the current candidate, where supported by the problem
+        self.hj.pid_cls.set_incumbent(self.hj.rbest.candidate)
+
+        # Resumed run continues from its checkpointed temperature, a warm start cooling from the previous temperature
+        # unless cooled off
+        inflight = self.resume_state()
+        if inflight is not None:
+            self.temp = inflight['temp']
+        else:
+            state = self.warm_state()
+            self.temp = state['temp'] if state and state['temp'] >= self.temp_threshold else self.initial_temp
 
         while self.hj.budget > 0:
+            self.checkpoint(temp=self.temp)
             if self.temp < self.temp_threshold:
                 if self.hj.reheat:
                     self.temp = self.initial_temp
                 else:
                     break
 
-            new_p = Particle()
-
-            # If continuous problem generate new solution otherwise perturb current candidate combination
-            if self.hj.pid_type == 'continuous':
-                new_p.candidate = self.get_generator()(lb=self.hj.pid_lb, ub=self.hj.pid_ub)
+            if inplace:
+                move = self.hj.variator_inplace(self.hj.rbest.candidate)
+                self.hj.budget -= move.cost
+                fitness, self.hj.budget = self.hj.pid_cls.evaluate_move(self.hj.rbest.candidate, self.hj.budget,
+                                                                        first=move.first)
             else:
-                new_p.candidate = self.hj.variator(self.hj.rbest.candidate)
+                new_p = Particle()
 
-            new_p.fitness, self.hj.budget = self.hj.pid_cls.evaluator(new_p.candidate, self.hj.budget)
-            loss = self.hj.rbest.fitness - new_p.fitness
+                # If continuous problem generate new solution otherwise perturb current candidate combination
+                if self.hj.pid_type == 'continuous':
+                    new_p.candidate = self.get_generator()(lb=self.hj.pid_lb, ub=self.hj.pid_ub)
+                else:
+                    new_p.candidate, move = self.hj.variator(self.hj.rbest.candidate)
+                    self.hj.budget -= move.cost
+
+                new_p.fitness, self.hj.budget = self.hj.pid_cls.evaluate_move(new_p.candidate, self.hj.budget)
+                fitness = new_p.fitness
+
+            loss = self.hj.rbest.fitness - fitness
             if loss > 0.3:
                 loss = 0.3
             probability = math.exp(loss / self.temp)
 
-            if (new_p.fitness < self.hj.rbest.fitness) or (self.random.random() < probability):
+            if (fitness < self.hj.rbest.fitness) or (self.random.random() < probability):
                 lg.msg(logging.DEBUG, 'Previous best {} replaced by new best {}'.format(self.hj.rbest.fitness,
-                                                                                        new_p.fitness))
-                self.hj.rbest = copy.deepcopy(new_p)
-                self.hj.rft.append(self.hj.rbest.fitness)
+                                                                                        fitness))
+                if inplace:
+                    self.hj.rbest.fitness = fitness
+                else:
+                    self.hj.rbest = copy.deepcopy(new_p)
+                self.hj.pid_cls.commit_move()
+                self.hj.rft.record(self.hj.budget_total - self.hj.budget, self.hj.rbest.fitness)
                 if not self.fromhyper:
                     self.hj.iter_last_imp[self.hj.run] = self.hj.budget_total - self.hj.budget
                     self.hj.imp_count[self.hj.run] += 1
+            else:
+                if inplace:
+                    self.hj.variator_cls.undo(self.hj.rbest.candidate, move)
+                self.hj.pid_cls.discard_move()
 
             self.temp *= self.cooling_rate
 
         lg.msg(logging.DEBUG, 'Completed annealing with temperature at {}'.format(self.temp))
+        self.save_state(temp=self.temp)
+
+    def anneal_chains(self):
+        """
+        Chains advanced in lockstep, each step moving every chain, scoring all neighbours as one batch and accepting,
+        rejecting and cooling them together. Chains share the run budget and optionally run at a ladder of temperatures,
+        exchanging states between neighbouring temperatures (parallel tempering). Run best is the best of all chains
+        """
+        combinatorial = self.hj.pid_type != 'continuous'
+
+        initial_temps = self.initial_temp * self.hj.temp_ladder_ratio ** np.arange(self.hj.chains)
+        temps = initial_temps.copy()
+
+        # Resumed run continues its checkpointed chains. Warm start continues the previous chains, the incumbent
+        # replacing the worst and cooled off chains reheated
+        inflight = self.resume_state()
+        state = self.warm_state() if inflight is None else None
+        step = 0
+        if inflight is not None:
+            candidates, fitness, temps, step = (inflight['candidates'], inflight['fitness'], inflight['temps'],
+                                                inflight['step'])
+        elif state:
+            candidates, fitness = state['candidates'], state['fitness']
+            worst = int(np.argmax(fitness))
+            if self.hj.rbest.fitness < fitness[worst]:
+                candidates[worst] = copy.deepcopy(self.hj.rbest.candidate)
+                fitness[worst] = self.hj.rbest.fitness
+            temps = np.where(state['temps'] < self.temp_threshold, initial_temps, state['temps'])
+
+        # Chains start from incoming candidate, otherwise from new candidates scored as one batch
+        elif self.hj.rbest.fitness == self.hj.rbest.fitness_default:
+            candidates = [self.get_generator()(lb=self.hj.pid_lb, ub=self.hj.pid_ub) for _ in range(self.hj.chains)]
+            fitness, self.hj.budget = self.hj.pid_cls.evaluate_batch(candidates, self.hj.budget)
+            best = int(np.argmin(fitness))
+            self.hj.rbest.candidate = copy.deepcopy(candidates[best])
+            self.hj.rbest.fitness = fitness[best].item()
+        else:
+            candidates = [copy.deepcopy(self.hj.rbest.candidate) for _ in range(self.hj.chains)]
+            fitness = np.full(self.hj.chains, self.hj.rbest.fitness)
 
-    def set_initial_temp(self):
-        candidates = []
-        for candidate in self.hj.pid_cls.initial_sample:
-            fitness, self.initial_temp_cost = self.hj.pid_cls.evaluator(candidate, self.initial_temp_cost)
-            candidates.append(fitness)
+        while self.hj.budget > 0:
+            self.checkpoint(candidates=candidates, fitness=fitness, temps=temps, step=step)
+            cold = temps < self.temp_threshold
+            if self.hj.reheat:
+                temps[cold] = initial_temps[cold]
+                cold[:] = False
+
+            # Chains moved this step, as many as remaining budget allows
+            active = np.flatnonzero(~cold)[:max(int(self.hj.budget), 0)]
+            if not len(active):
+                break
+
+            # Combinatorial neighbours are moves applied in place, continuous are new solutions
+            if combinatorial:
+                moves = [self.hj.variator_inplace(candidates[ci]) for ci in active.tolist()]
+                self.hj.budget -= sum(move.cost for move in moves)
+                neighbours = [candidates[ci] for ci in active.tolist()]
+            else:
+                neighbours = [self.get_generator()(lb=self.hj.pid_lb, ub=self.hj.pid_ub) for _ in active.tolist()]
+            new_fitness, self.hj.budget = self.hj.pid_cls.evaluate_batch(neighbours, self.hj.budget)
+
+            loss = np.minimum(fitness[active] - new_fitness, 0.3)
+            probability = np.exp(loss / temps[active])
+            accept = (new_fitness < fitness[active]) | (self.random_batch(len(active)) < probability)
+
+            for ni, (ci, accepted) in enumerate(zip(active.tolist(), accept.tolist())):
+                if combinatorial and not accepted:
+                    self.hj.variator_cls.undo(candidates[ci], moves[ni])
+                elif not combinatorial and accepted:
+                    candidates[ci] = neighbours[ni]
+            fitness = fitness.astype(np.result_type(fitness, new_fitness))
+            fitness[active[accept]] = new_fitness[accept]
+
+            temps[active] *= self.cooling_rate
+
+            best = int(np.argmin(fitness))
+            if fitness[best] < self.hj.rbest.fitness:
+                lg.msg(logging.DEBUG, 'Previous best {} replaced by new best {} of chain {}'.format(
+                    self.hj.rbest.fitness, fitness[best], best))
+                self.hj.rbest = Particle()
+                self.hj.rbest.candidate = copy.deepcopy(candidates[best])
+                self.hj.rbest.fitness = fitness[best].item()
+                self.hj.rft.record(self.hj.budget_total - self.hj.budget, self.hj.rbest.fitness)
+                if not self.fromhyper:
+                    self.hj.iter_last_imp[self.hj.run] = self.hj.budget_total - self.hj.budget
+                    self.hj.imp_count[self.hj.run] += 1
 
-        it = int(np.percentile(candidates, 60))
+            step += 1
+            if self.hj.tempering_interval and step % self.hj.tempering_interval == 0:
+                self.exchange_chains(candidates, fitness, temps, step // self.hj.tempering_interval % 2)
+
+        lg.msg(logging.DEBUG, 'Completed annealing of {} chains with temperatures at {}'.format(self.hj.chains, temps))
+        self.save_state(candidates=candidates, fitness=fitness, temps=temps)
+
+    def exchange_chains(self, candidates, fitness, temps, parity):
+        """
+        Parallel tempering exchange of states between chains at neighbouring temperatures, alternating even and odd
+        pairs so pairs are disjoint, with the Metropolis criterion exp((f(i) - f(j)) * (1/T(i) - 1/T(j)))
+        """
+        lower = np.arange(parity, len(temps) - 1, 2)
+        upper = lower + 1
+        delta = (fitness[lower] - fitness[upper]) * (1 / temps[lower] - 1 / temps[upper])
+        swap = self.random_batch(len(lower)) < np.exp(np.minimum(delta, 0))
+        lower, upper = lower[swap], upper[swap]
+        for i, j in zip(lower.tolist(), upper.tolist()):
+            candidates[i], candidates[j] = candidates[j], candidates[i]
+        fitness[lower], fitness[upper] = fitness[upper], fitness[lower]
+
+    def set_initial_temp(self):
+        """
+        60th percentile fitness of a random sample sized by budget, estimated once per instance and sample size and
+        shared by every SA job and run of it
+        """
+        num = self.hj.pid_cls.initial_sample_size()
+        # Sampling cost is charged once per job, on its first run, whether estimated here or shared, so results don't
+        # depend on job order
+        self.initial_temp_cost = num if self.hj.run == 0 else 0
+        return InstanceRegistry.get(('initial_temp', self.hj.pid, self.hj.bid, num), self.estimate_initial_temp, num)
+
+    def estimate_initial_temp(self, num):
+        # Sample streamed in batches into a bounded reservoir, from its own stream seeded by instance and size
+        rng = np.random.default_rng(zlib.crc32('{} {} {}'.format(self.hj.pid, self.hj.bid, num).encode()))
+        reservoir = Reservoir(rng=rng)
+        for batch in self.hj.pid_cls.initial_sample_batches(num, rng):
+            reservoir.add(self.hj.pid_cls.fitness_batch(batch))  # Bypasses fitness cache, sample isn't revisited
+
+        it = int(reservoir.percentile(60))
         return it
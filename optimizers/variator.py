@@ -1,85 +1,117 @@
+import collections
 import copy
 
 
+class Move(collections.namedtuple('Move', ['type', 'i', 'j', 'fitness', 'cost'], defaults=(None, 0))):
+    """
+    Record of a move applied in place at positions i and j, enough to undo it or evaluate it incrementally. Moves found
+    by evaluating alternatives carry the fitness of the neighbour and the budget cost of the search, charged by the
+    caller
+    """
+    __slots__ = ()
+
+    @property
+    def first(self):
+        # First position changed, from which a delta evaluator recomputes
+        return min(self.i, self.j)
+
+
 class Variator:
     def __init__(self, **kwargs):
         # Persist current configuration and problem
         self.random = kwargs['random']
         self.hj = kwargs['hopjob']
 
+    def neighbour(self, candidate, variator_inplace):
+        """
+        Copy of candidate with move applied and the move, of which only the cost is kept for the rows of a continuous
+        candidate, each moved in turn
+        """
+        candidate = copy.deepcopy(candidate)
+        if self.hj.pid_type == 'combinatorial':
+            return candidate, variator_inplace(candidate)
+        moves = [variator_inplace(c) for c in candidate]
+        return candidate, Move('rows', None, None, cost=sum(m.cost for m in moves))
+
     def variator_n_exchange(self, candidate):
         """
         Exchange positions and i and j
         """
-        def _exchange(_c):
-            ops = self.random.sample(range(0, len(_c)), 2)
-            _c[ops[0]], _c[ops[1]] = _c[ops[1]], _c[ops[0]]
-            return _c
+        return self.neighbour(candidate, self.variator_n_exchange_inplace)
 
-        candidate = copy.deepcopy(candidate)
-        if self.hj.pid_type == 'combinatorial':
-            candidate = _exchange(candidate)
-        else:
-            for c in candidate:
-                c = _exchange(c)
-        return candidate
+    def variator_n_exchange_inplace(self, candidate):
+        ops = self.random.sample(range(0, len(candidate)), 2)
+        candidate[ops[0]], candidate[ops[1]] = candidate[ops[1]], candidate[ops[0]]
+        return Move('exchange', ops[0], ops[1])
 
     def variator_n_exchange_adjacent(self, candidate):
         """
         Exchange positions and i and i+1
         """
-        def _exchange_adjacent(_c):
-            i = self.random.randint(0, len(_c) - 1)
-            j = i + 1
-            if j > len(_c) - 1:
-                j = 0
-            _c[i], _c[j] = _c[j], _c[i]
-            return _c
+        return self.neighbour(candidate, self.variator_n_exchange_adjacent_inplace)
 
-        candidate = copy.deepcopy(candidate)
-        if self.hj.pid_type == 'combinatorial':
-            candidate = _exchange_adjacent(candidate)
-        else:
-            for c in candidate:
-                c = _exchange_adjacent(c)
-        return candidate
+    def variator_n_exchange_adjacent_inplace(self, candidate):
+        i = self.random.randint(0, len(candidate) - 1)
+        j = i + 1
+        if j > len(candidate) - 1:
+            j = 0
+        candidate[i], candidate[j] = candidate[j], candidate[i]
+        return Move('exchange', i, j)
 
     def variator_n_remove_insert(self, candidate):
         """
         Remove i and insert at j
         """
-        def _remove_insert(_c):
-            i = self.random.randint(0, len(_c) - 1)
-            j = self.random.randint(0, len(_c) - 1)
-            while i == j:
-                j = self.random.randint(0, len(_c) - 1)
-            _c.insert(j, _c.pop(i))
-            return _c
+        return self.neighbour(candidate, self.variator_n_remove_insert_inplace)
 
-        candidate = copy.deepcopy(candidate)
-        if self.hj.pid_type == 'combinatorial':
-            candidate = _remove_insert(candidate)
-        else:
-            for c in candidate:
-                c = _remove_insert(c)
-        return candidate
+    def variator_n_remove_insert_inplace(self, candidate):
+        i = self.random.randint(0, len(candidate) - 1)
+        j = self.random.randint(0, len(candidate) - 1)
+        while i == j:
+            j = self.random.randint(0, len(candidate) - 1)
+        candidate.insert(j, candidate.pop(i))
+        return Move('insert', i, j)
 
     def variator_n_to_first(self, candidate):
         """
         Remove i and move to first
         """
-        def _to_first(_c):
-            i = self.random.randint(0, len(_c) - 1)
-            j = 0
-            while i == j:
-                i = self.random.randint(0, len(_c) - 1)
-            _c.insert(j, _c.pop(i))
-            return _c
+        return self.neighbour(candidate, self.variator_n_to_first_inplace)
 
-        candidate = copy.deepcopy(candidate)
-        if self.hj.pid_type == 'combinatorial':
-            candidate = _to_first(candidate)
+    def variator_n_to_first_inplace(self, candidate):
+        i = self.random.randint(0, len(candidate) - 1)
+        j = 0
+        while i == j:
+            i = self.random.randint(0, len(candidate) - 1)
+        candidate.insert(j, candidate.pop(i))
+        return Move('insert', i, j)
+
+    def variator_best_insertion(self, candidate):
+        """
+        Remove i and insert at best position j, with all positions evaluated together by the problem
+        """
+        return self.neighbour(candidate, self.variator_best_insertion_inplace)
+
+    def variator_best_insertion_inplace(self, candidate):
+        if self.hj.pid_type != 'combinatorial':
+            return self.variator_n_remove_insert_inplace(candidate)
+
+        i = self.random.randint(0, len(candidate) - 1)
+        job = candidate.pop(i)
+        j, fitness = self.hj.pid_cls.best_insertion(candidate, job)
+        candidate.insert(j, job)
+
+        # Evaluating the insertion positions has a computational cost, a fraction of the n-1 positions other than the
+        # neighbour returned, which the optimizer evaluates as usual. A coefficient of 1 equals the cost of evaluating
+        # every insertion position in full
+        return Move('insert', i, j, fitness, int(self.hj.best_insertion_budget_coeff * (len(candidate) - 1)))
+
+    @staticmethod
+    def undo(candidate, move):
+        """
+        Revert move applied in place by an _inplace variator, e.g. when the neighbour is rejected
+        """
+        if move.type == 'exchange':
+            candidate[move.i], candidate[move.j] = candidate[move.j], candidate[move.i]
         else:
-            for c in candidate:
-                c = _to_first(c)
-        return candidate
+            candidate.insert(move.i, candidate.pop(move.j))
@@ -0,0 +1,11 @@
+from problems.continuous import Continuous
+import numpy as np
+
+
+class ACKLEY(Continuous):
+    """
+    Ackley
+    """
+    def function(self, x):
+        return (-20 * np.exp(-0.2 * np.sqrt((x ** 2).mean(axis=-1))) - np.exp(np.cos(2 * np.pi * x).mean(axis=-1)) +
+                20 + np.e)
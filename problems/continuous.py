@@ -0,0 +1,75 @@
+from problems.problem import Problem
+import numpy as np
+
+
+class Continuous(Problem):
+    """
+    Continuous benchmark function super class, vectorized over (k, n) candidate matrix
+    """
+    separable = False  # Separable functions are a sum of independent per-coordinate terms
+
+    def __init__(self, **kwargs):
+        Problem.__init__(self, **kwargs)
+
+        # Set n dimensions, which continuous functions take from the problem configuration
+        if self.hj.pid_dimension < 1:
+            raise ValueError('Dimension of problem {} not set in problems configuration'.format(self.hj.pid))
+        self.n = self.hj.pid_dimension
+
+        # Per-coordinate terms of incumbent and pending neighbour, separable functions only
+        self.incumbent = None
+        self.pending = None
+
+    def fitness_batch(self, candidates):
+        return self.function(np.asarray(candidates, dtype=np.float64))
+
+    def function(self, x):
+        return self.terms(x).sum(axis=-1)
+
+    def terms(self, x):
+        raise NotImplementedError
+
+    def set_incumbent(self, candidate):
+        if not self.separable:
+            return
+        x = np.array(candidate, dtype=np.float64)
+        terms = self.terms(x)
+        self.incumbent = {'candidate': x, 'terms': terms, 'fitness': terms.sum()}
+        self.pending = None
+
+    def evaluate_move(self, candidate, budget=1, first=None):
+        """
+        Fitness of neighbour of incumbent, updating only the terms of changed coordinates, or of coordinate first alone.
+        Neighbour changing several coordinates, e.g. drawn afresh, is evaluated in full
+        """
+        if self.incumbent is None:
+            return self.evaluator(candidate, budget)
+
+        x = np.array(candidate, dtype=np.float64)
+        if first is None:
+            changed = np.flatnonzero(x != self.incumbent['candidate'])
+            if len(changed) > 1:
+                self.pending = {'candidate': x, 'changed': None}
+                return self.evaluator(candidate, budget)
+        else:
+            changed = np.array([first])
+        terms = self.terms(x[changed])
+        fitness = self.incumbent['fitness'] + terms.sum() - self.incumbent['terms'][changed].sum()
+
+        self.pending = {'candidate': x, 'changed': changed, 'terms': terms, 'fitness': fitness}
+        budget -= 1  # Charged as a full evaluation
+        return float(fitness), budget
+
+    def commit_move(self):
+        if self.pending is None:
+            return
+        if self.pending['changed'] is None:
+            self.set_incumbent(self.pending['candidate'])
+            return
+        self.incumbent['terms'][self.pending['changed']] = self.pending['terms']
+        self.incumbent['candidate'] = self.pending['candidate']
+        self.incumbent['fitness'] = self.pending['fitness']
+        self.pending = None
+
+    def discard_move(self):
+        self.pending = None
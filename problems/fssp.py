@@ -3,6 +3,98 @@ import logging
 from utilities.helper import Helper
 from utilities import logger as lg
 from utilities.stats import Stats
+from problems.instance_registry import InstanceRegistry
+import numpy as np
+import hashlib
+import os
+
+
+class FSSPInstance:
+    """
+    FSSP benchmark instance and its derived data, loaded once per process and shared read-only between jobs
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.n = 0  # Number of jobs
+        self.m = 0  # Number of machines
+        self.ilb = 0  # Instance lower bound
+        self.iub = 0  # Instance upper bound
+        self.processing_times = None  # Contiguous (n jobs, m machines) matrix, memory-mapped
+        self.total_units = []
+        self.loadout_times = []
+        self.lower_bounds_taillard = []
+
+        self.load()
+        self.jobs_set_total_units()
+        self.machines_set_loadout_times()
+        self.machines_set_lower_bounds_taillard()
+
+        self.processing_times.flags.writeable = False
+
+    def __reduce__(self):
+        # Pickled by filename alone and resolved through the registry when unpickled, so jobs sent to worker processes
+        # share the instance and its memory-mapped processing times rather than each unpickling a private copy
+        return InstanceRegistry.get, (self.filename, FSSPInstance, self.filename)
+
+    def load(self):
+        # Benchmark text is converted on first use to binary, memory-mapped so processes share the OS page cache
+        if self.filename.endswith('.bin'):
+            binary = self.filename
+        else:
+            binary = os.path.splitext(self.filename)[0] + '.bin'
+            if not os.path.exists(binary) or os.path.getmtime(binary) < os.path.getmtime(self.filename):
+                self.convert(self.filename, binary)
+
+        header = np.fromfile(binary, dtype='<i4', count=4)
+        self.n, self.m, self.ilb, self.iub = header.tolist()
+        self.processing_times = np.memmap(binary, dtype='<i4', mode='r', offset=header.nbytes,
+                                          shape=(self.n, self.m)).view(np.ndarray)
+
+    @staticmethod
+    def convert(filename, binary):
+        """
+        Convert Taillard text benchmark to binary header of n, m, lb and ub followed by (n jobs, m machines) matrix, all
+        little-endian int32
+        """
+        with open(filename, 'r') as f:
+            n, m = [int(n) for n in f.readline().split()]
+            ub, lb = [int(n) for n in f.readline().split()]
+
+            # Benchmark lists machine rows of job times, transpose to job rows of machine times
+            machine_times = np.loadtxt(f, dtype='<i4', ndmin=2)
+
+        # Write under temporary name and rename, so concurrent processes never map a partially written file
+        tmp = binary + '.' + str(os.getpid()) + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.array([n, m, lb, ub], dtype='<i4').tofile(f)
+            np.ascontiguousarray(machine_times.T, dtype='<i4').tofile(f)
+        os.replace(tmp, binary)
+
+    def jobs_set_total_units(self):
+        self.total_units = self.processing_times.sum(axis=1).tolist()
+        if logging.DEBUG >= logging.getLogger().level:
+            for ji, j in enumerate(self.total_units):
+                lg.msg(logging.DEBUG, 'Job {} allocated {} time units'.format(ji, j))
+
+    def machines_set_loadout_times(self):
+        self.loadout_times = self.processing_times.sum(axis=0).tolist()
+        for m, loadout in enumerate(self.loadout_times):
+            lg.msg(logging.DEBUG, 'Machine {} loaded with {} time units'.format(m, loadout))
+
+    def machines_set_lower_bounds_taillard(self):
+        # Machine load plus minimum time any job needs before reaching and after leaving the machine
+        heads = np.cumsum(self.processing_times, axis=1) - self.processing_times
+        tails = self.processing_times.sum(axis=1, keepdims=True) - np.cumsum(self.processing_times, axis=1)
+        self.lower_bounds_taillard = (np.array(self.loadout_times) + heads.min(axis=0) + tails.min(axis=0)).tolist()
+        for m, lb in enumerate(self.lower_bounds_taillard):
+            lg.msg(logging.DEBUG, 'Machine {} Taillard lower bound is {} time units'.format(m, lb))
+
+        lg.msg(logging.INFO, 'Calculated Taillard benchmark instance lower bound (max) is {} time units'.format(
+            max(self.lower_bounds_taillard)))
+
+        if max(self.lower_bounds_taillard) != self.ilb:
+            lg.msg(logging.WARNING, 'Calculated Taillard instance benchmark ({}) != lb in benchmark instance file '
+                                    '({})'.format(max(self.lower_bounds_taillard), self.ilb))
 
 
 class FSSP(Problem):
@@ -12,10 +104,12 @@ class FSSP(Problem):
     def __init__(self, **kwargs):
         Problem.__init__(self, **kwargs)
 
-        self.jobs = {'quantity': 0, 'list': [], 'total_units': []}
-        self.machines = {'quantity': 0, 'loadout_times': [], 'lower_bounds_taillard': [], 'assigned_jobs': []}
+        self.jobs = {'quantity': 0, 'total_units': []}
+        self.machines = {'quantity': 0, 'loadout_times': [], 'lower_bounds_taillard': []}
 
-        # Load benchmark instance
+        # Load benchmark instance, shared with all other jobs of the same benchmark
+        self.instance = None
+        self.processing_times = None
         self.ilb = 0  # Instance lower bound
         self.iub = 0  # Instance upper bound
         self.load_instance()
@@ -23,45 +117,170 @@ class FSSP(Problem):
         # Set n dimensions
         self.n = self.jobs['quantity']
 
-        self.pre_processing_done = False
-
-    def evaluator(self, candidate, budget=1):
-        self.machines['assigned_jobs'] = []
-        for i in range(0, self.machines['quantity']):
-            self.machines['assigned_jobs'].append([])
-
-        for ji, j in enumerate(candidate):
-            start_time = 0
-            end_time = 0
-            for mi, mt in enumerate(self.jobs['list'][j]):
-                if self.machines['assigned_jobs'][mi]:
-                    if mi == 0:
-                        start_time = self.machines['assigned_jobs'][mi][-1][2]
-                    else:
-                        curr_job_prev_task_end = self.machines['assigned_jobs'][mi][-1][2]
-                        prev_job_task_end = self.machines['assigned_jobs'][mi - 1][-1][2]
-                        start_time = max(curr_job_prev_task_end, prev_job_task_end)
-
-                end_time = start_time + mt
-                self.machines['assigned_jobs'][mi].append((j, start_time, end_time))
-                start_time = end_time
-
-        budget -= 1  # Evaluating has a computational cost so reduce budget
-        return self.machines['assigned_jobs'][-1][-1][2], budget
-
-    def pre_processing(self):
-        if not self.pre_processing_done:
-            self.jobs_set_total_units()
-            self.machines_set_loadout_times()
-            self.machines_set_lower_bounds_taillard()
-            self.pre_processing_done = True
+        # Detailed start and end times, only materialized on demand for reporting e.g. final gbest
+        self.schedule = None
+
+        # Completion time matrix of incumbent permutation and pending neighbour suffix for incremental evaluation
+        self.incumbent = None
+        self.pending = None
+        self.delta_rows_max = 32  # Suffixes up to this many jobs are recomputed row by row rather than per machine
+
+    def __getstate__(self):
+        # Instance data is restored from the instance itself, pickled by filename, rather than pickled as copies
+        state = self.__dict__.copy()
+        for k in ('processing_times', 'jobs', 'machines'):
+            del state[k]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.set_instance(self.instance)
+
+    def fitness_batch(self, candidates):
+        """
+        Makespan of each permutation in (k, n) matrix
+        """
+        permutations = np.asarray(candidates, dtype=np.intp)
+        return self.completion_times(self.processing_times.T[:, permutations])[-1, :, -1]
+
+    @staticmethod
+    def completion_times(pt, boundary=None):
+        """
+        Completion time recurrence C(i, j) = max(C(i-1, j), C(i, j-1)) + p(i, j) over machine-major (m, ..., n)
+        processing times, solved one machine j at a time for all job positions i as S(i) + max(C(l, j-1) - S(l-1)) for
+        l <= i, where S is the cumulative processing time on machine j. Optional boundary holds completion times per
+        machine of the job position preceding the first
+        """
+        cumulative = np.cumsum(pt, axis=-1, dtype=np.int64)
+        offset = pt - cumulative
+        completion = np.zeros(pt.shape[1:], dtype=np.int64)
+        for mi in range(len(pt)):
+            np.add(completion, offset[mi], out=completion)
+            np.maximum.accumulate(completion, axis=-1, out=completion)
+            if boundary is not None:
+                np.maximum(completion, boundary[mi], out=completion)
+            np.add(completion, cumulative[mi], out=completion)
+            cumulative[mi] = completion  # Cumulative times of machine no longer required, reuse for result
+        return cumulative
+
+    def completion_matrix(self, permutation, boundary=None):
+        """
+        Completion time (n, m) matrix of permutation, optionally following completion times boundary
+        """
+        return self.completion_times(self.processing_times.T[:, permutation], boundary).T
+
+    def completion_rows(self, permutation, boundary):
+        """
+        Completion time rows of short permutation following completion times boundary, computed job by job as the
+        per-machine NumPy overhead outweighs the work for few jobs
+        """
+        rows = []
+        prev = boundary
+        for job_times in self.processing_times[permutation].tolist():
+            completion = 0
+            row = []
+            for p, t in zip(prev, job_times):
+                if p > completion:
+                    completion = p
+                completion += t
+                row.append(completion)
+            rows.append(row)
+            prev = row
+        return rows
+
+    def build_schedule(self, permutation):
+        """
+        Start and end time (n, m) matrices of permutation, cached for reuse across reporting
+        """
+        if self.schedule is not None and self.schedule['permutation'] == list(permutation):
+            return self.schedule
+
+        permutation = list(permutation)
+        end = self.completion_matrix(np.asarray(permutation, dtype=np.intp))
+        self.schedule = {'permutation': permutation, 'start': end - self.processing_times[permutation], 'end': end}
+        return self.schedule
+
+    def set_incumbent(self, candidate):
+        # Completion times of current solution, from which neighbours are incrementally evaluated
+        permutation = np.array(candidate, dtype=np.intp)
+        self.incumbent = {'permutation': permutation, 'completion': np.ascontiguousarray(
+            self.completion_matrix(permutation))}
+        self.pending = None
+
+    def evaluate_move(self, candidate, budget=1, first=None):
+        """
+        Makespan of neighbour of incumbent, recomputing completion times only from first changed job position onward
+        """
+        if self.incumbent is None:
+            return self.evaluator(candidate, budget)
+
+        # With the first changed position known, e.g. from a move record, only the suffix is read from the candidate
+        permutation = candidate
+        if first is None:
+            permutation = np.array(candidate, dtype=np.intp)
+            changed = np.flatnonzero(permutation != self.incumbent['permutation'])
+            first = int(changed[0]) if len(changed) else len(permutation)
+
+        if first == len(permutation):
+            suffix = None
+            makespan = int(self.incumbent['completion'][-1, -1])
+        elif len(permutation) - first <= self.delta_rows_max:
+            boundary = self.incumbent['completion'][first - 1].tolist() if first > 0 else [0] * self.machines['quantity']
+            suffix = self.completion_rows(permutation[first:], boundary)
+            makespan = suffix[-1][-1]
+        else:
+            boundary = self.incumbent['completion'][first - 1] if first > 0 else None
+            suffix = self.completion_matrix(permutation[first:], boundary)
+            makespan = int(suffix[-1, -1])
+
+        self.pending = {'permutation': permutation, 'first': first, 'suffix': suffix}
+        budget -= 1  # Charged as a full evaluation
+        return makespan, budget
+
+    def commit_move(self):
+        # Neighbour accepted, pending suffix becomes part of incumbent completion times
+        if self.pending is None:
+            return
+        first = self.pending['first']
+        if self.pending['suffix'] is not None:
+            self.incumbent['completion'][first:] = self.pending['suffix']
+            self.incumbent['permutation'][first:] = self.pending['permutation'][first:]
+        self.pending = None
+
+    def discard_move(self):
+        self.pending = None
+
+    def best_insertion(self, partial, job):
+        """
+        Best of all insertion positions of job into partial permutation using Taillard's acceleration, from heads e,
+        tails q and completion times f of job inserted at each position in O(n.m) overall
+        """
+        partial = np.asarray(partial, dtype=np.intp)
+        heads = np.zeros((len(partial) + 1, self.machines['quantity']), dtype=np.int64)  # e(i-1, j), row 0 empty
+        tails = np.zeros((len(partial) + 1, self.machines['quantity']), dtype=np.int64)  # q(i, j), last row empty
+        if len(partial):
+            heads[1:] = self.completion_matrix(partial)
+            # Tails are completion times of reversed sequence through reversed machines
+            tails[:-1] = self.completion_times(self.processing_times.T[::-1, partial[::-1]]).T[::-1, ::-1]
+
+        inserted = np.zeros(len(partial) + 1, dtype=np.int64)  # f(i, j)
+        makespans = np.zeros(len(partial) + 1, dtype=np.int64)
+        for mi, t in enumerate(self.processing_times[job].tolist()):
+            np.maximum(inserted, heads[:, mi], out=inserted)
+            inserted += t
+            np.maximum(makespans, inserted + tails[:, mi], out=makespans)
+
+        position = int(np.argmin(makespans))
+        return position, int(makespans[position])
 
     def post_processing(self):
         self.hj.pid_lb_diff_pct, self.hj.pid_ub_diff_pct = Stats.bounds_compare(self.ilb, self.iub, self.hj.gbest.fitness)
 
-        fitness, _ = self.evaluator(self.hj.gbest.candidate)  # set machine assigned jobs to best permutation
+        fitness, _ = self.evaluator(self.hj.gbest.candidate)
+        schedule = self.build_schedule(self.hj.gbest.candidate)
         filename = self.hj.results_path + '/' + self.hj.pid + ' ' + self.hj.bid + ' ' + self.hj.oid + ' gbest Gantt chart'
-        self.vis.solution_representation_gantt(fitness, self.machines, self.jobs, filename)
+        if self.hj.plots:
+            self.vis.solution_representation_gantt(fitness, schedule, self.jobs, filename)
 
         lg.msg(logging.INFO, 'Machine times for best fitness {}'.format(fitness))
         self.machines_times(self.hj.gbest.candidate)
@@ -69,54 +288,41 @@ class FSSP(Problem):
         lg.msg(logging.INFO, 'Job times for best fitness of {} with permutation {}'.format(fitness, self.hj.gbest.candidate))
         self.jobs_times(self.hj.gbest.candidate)
 
+    def benchmark_digest(self):
+        # Parsed instance rather than file, so only a change of instance data changes the digest
+        header = np.array([self.instance.n, self.instance.m, self.ilb, self.iub], dtype='<i4')
+        return hashlib.blake2b(header.tobytes() + self.processing_times.tobytes(), digest_size=16).hexdigest()
+
     def load_instance(self):
         filename = 'benchmarks/fssp/' + self.hj.bid
-        with open(filename, 'r') as f:
-            line = f.readlines()
-            for i, job_detail in enumerate(line):
-                job_detail = job_detail.strip('\n')
-                if i == 0:
-                    self.jobs['quantity'], self.machines['quantity'] = [int(n) for n in job_detail.split()]
-                elif i == 1:
-                    self.iub, self.ilb = [int(n) for n in job_detail.split()]
-                else:
-                    self.jobs_add(job_detail)
-
-    def jobs_add(self, jobs):
-        job_times = [int(n) for n in jobs.split()]
-        for ji, jt in enumerate(job_times):
-            try:
-                self.jobs['list'][ji].append(jt)
-            except IndexError:
-                self.jobs['list'].append([jt])
+        self.set_instance(InstanceRegistry.get(filename, FSSPInstance, filename))
 
-    def jobs_set_total_units(self):
-        self.jobs['total_units'] = [sum(j) for j in self.jobs['list']]
-        if logging.DEBUG >= self.logger.level:
-            for ji, j in enumerate(self.jobs['total_units']):
-                lg.msg(logging.DEBUG, 'Job {} allocated {} time units'.format(ji, j))
+    def set_instance(self, instance):
+        self.instance = instance
+        self.processing_times = self.instance.processing_times
+        self.ilb = self.instance.ilb
+        self.iub = self.instance.iub
+        self.jobs = {'quantity': self.instance.n, 'total_units': self.instance.total_units}
+        self.machines = {'quantity': self.instance.m, 'loadout_times': self.instance.loadout_times,
+                         'lower_bounds_taillard': self.instance.lower_bounds_taillard}
 
     def jobs_times(self, permutation):
         jt = []
         total_idle_time = 0
-        _ = self.evaluator(permutation)  # Evaluate best permutation to set machines
+        schedule = self.build_schedule(permutation)
 
         cols = ['Job', 'Start Time', 'Finish Time', 'Idle Time']
         jt.append(cols)
 
+        # Idle time of job is sum of waits between finishing on machine m and starting on machine m+1
+        start_times = schedule['start'][:, 0].tolist()
+        end_times = schedule['end'][:, -1].tolist()
+        idle_times = (schedule['start'][:, 1:] - schedule['end'][:, :-1]).sum(axis=1).tolist()
+
         format_spec = "{:>15}" * 4
         lg.msg(logging.INFO, format_spec.format(*cols))
         for pi, p in enumerate(permutation):
-            start_time = 0
-            end_time = 0
-            idle_time = 0
-            for ji, j in enumerate(self.machines['assigned_jobs']):
-                if ji == 0:
-                    start_time = j[pi][1]
-                    end_time = j[pi][2]
-                    continue
-                idle_time += j[pi][1] - end_time
-                end_time = j[pi][2]
+            start_time, end_time, idle_time = start_times[pi], end_times[pi], idle_times[pi]
             lg.msg(logging.INFO, format_spec.format(str(p), str(start_time), str(end_time), str(idle_time)))
             jt.append([str(p), str(start_time), str(end_time), str(idle_time)])
             total_idle_time += idle_time
@@ -125,53 +331,26 @@ class FSSP(Problem):
                    ' jobs times run ' + str(self.hj.run) + '.csv'
         Helper.write_to_csv(jt, filename, header=True)
 
-    def machines_set_loadout_times(self):
-        for m in range(self.machines['quantity']):
-            loadout = sum(i[m] for i in self.jobs['list'])
-            self.machines['loadout_times'].append(loadout)
-            lg.msg(logging.DEBUG, 'Machine {} loaded with {} time units'.format(m, loadout))
-
-    def machines_set_lower_bounds_taillard(self):
-        for m in range(self.machines['quantity']):
-            lb = self.machines['loadout_times'][m]
-            minimum_before_machine_start = []
-            minimum_after_machine_start = []
-            for j in self.jobs['list']:
-                if m > 0:
-                    minimum_before_machine_start.append(sum(j[:m]))
-                if m < self.machines['quantity']:
-                    minimum_after_machine_start.append(sum(j[m+1:]))
-            if minimum_before_machine_start:
-                lb += min(minimum_before_machine_start)
-            if minimum_after_machine_start:
-                lb += min(minimum_after_machine_start)
-            self.machines['lower_bounds_taillard'].append(lb)
-            lg.msg(logging.DEBUG, 'Machine {} Taillard lower bound is {} time units'.format(m, lb))
-
-        lg.msg(logging.INFO, 'Calculated Taillard benchmark instance lower bound (max) is {} time units'.format(
-            max(self.machines['lower_bounds_taillard'])))
-
-        if max(self.machines['lower_bounds_taillard']) != self.ilb:
-            lg.msg(logging.WARNING, 'Calculated Taillard instance benchmark ({}) != lb in benchmark instance file ' 
-                                    '({})'.format(max(self.machines['lower_bounds_taillard']), self.ilb))
-
     def machines_times(self, permutation):
         mt = []
         total_idle_time = 0
-        _ = self.evaluator(permutation)
+        schedule = self.build_schedule(permutation)
 
         cols = ['Machine', 'Start Time', 'Finish Time', 'Idle Time']
         mt.append(cols)
 
+        # Calculate idle time as start time(j+1) - finish time(j) of consecutive jobs on each machine
+        start_times = schedule['start'][0].tolist()
+        finish_times = schedule['end'][-1].tolist()
+        idle_times = (schedule['start'][1:] - schedule['end'][:-1]).sum(axis=0).tolist()
+
         format_spec = "{:>15}" * 4
         lg.msg(logging.INFO, format_spec.format(*cols))
-        # Calculate idle time from list tuples as start time(m+1) - finish time(m). Include last machine start time
-        for mi, m in enumerate(self.machines['assigned_jobs']):
-            finish_time = m[-1][2]
-            idle_time = sum([x[1]-x[0] for x in zip([x[2] for x in m], [x[1] for x in m[1:] + [(0, m[-1][2], 0)]])])
-            total_idle_time += idle_time
-            lg.msg(logging.INFO, format_spec.format(str(mi), str(m[0][1]), str(finish_time), str(idle_time)))
-            mt.append([str(mi), str(m[0][1]), str(finish_time), str(idle_time)])
+        for mi in range(self.machines['quantity']):
+            total_idle_time += idle_times[mi]
+            lg.msg(logging.INFO, format_spec.format(str(mi), str(start_times[mi]), str(finish_times[mi]),
+                                                    str(idle_times[mi])))
+            mt.append([str(mi), str(start_times[mi]), str(finish_times[mi]), str(idle_times[mi])])
         lg.msg(logging.INFO, 'Machines total idle time is {}'.format(total_idle_time))
         filename = self.hj.results_path + '/' + self.hj.pid + ' ' + self.hj.bid + ' ' + self.hj.oid + \
                    ' machines times run ' + str(self.hj.run) + '.csv'
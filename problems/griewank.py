@@ -0,0 +1,11 @@
+from problems.continuous import Continuous
+import numpy as np
+
+
+class GRIEWANK(Continuous):
+    """
+    Griewank
+    """
+    def function(self, x):
+        i = np.arange(1, x.shape[-1] + 1)
+        return 1 + (x ** 2).sum(axis=-1) / 4000 - np.cos(x / np.sqrt(i)).prod(axis=-1)
@@ -0,0 +1,12 @@
+class InstanceRegistry:
+    """
+    Process-wide registry of benchmark instances and data derived from them, each loaded or computed once and shared
+    read-only by all jobs
+    """
+    instances = {}
+
+    @classmethod
+    def get(cls, key, loader, *args):
+        if key not in cls.instances:
+            cls.instances[key] = loader(*args)
+        return cls.instances[key]
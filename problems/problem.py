@@ -1,7 +1,6 @@
 import logging
 from utilities.visualisation import Visualisation
 import numpy as np
-import pandas as pd
 
 class Problem:
     """
@@ -14,6 +13,7 @@ class Problem:
         self.vis = Visualisation()
         self.logger = logging.getLogger()
         self.n = 0
+        self.fitness_cache = None
 
     @staticmethod
     def candidate_spv_continuous_to_discrete(c):
@@ -21,12 +21,81 @@ class Problem:
         spv = sorted(range(len(c)), key=lambda i: c[i], reverse=False)
         return spv
 
+    @staticmethod
+    def candidates_spv_continuous_to_discrete(positions):
+        # Smallest position value of each row of (k, n) positions, stable as per single candidate sort
+        return np.argsort(positions, axis=1, kind='stable')
+
+    def evaluator(self, candidate, budget=1):
+        fitness, budget = self.evaluate_batch([candidate], budget)
+        return fitness.tolist()[0], budget
+
+    def evaluate_batch(self, candidates, budget=0):
+        """
+        Fitness of each candidate, budget reduced by an evaluation per candidate unless served uncharged from cache
+        """
+        if self.fitness_cache is None:
+            budget -= len(candidates)  # Evaluating has a computational cost so reduce budget
+            return self.fitness_batch(candidates), budget
+
+        # Candidates repeated within the batch are looked up and evaluated once, repeats counting as hits
+        keys = [self.fitness_cache.key(c) for c in candidates]
+        first = {}
+        for i, k in enumerate(keys):
+            first.setdefault(k, i)
+        self.fitness_cache.hits += len(keys) - len(first)
+
+        fitness = {k: self.fitness_cache.get(k) for k in first}
+        missed = [k for k, f in fitness.items() if f is None]
+        if missed:
+            for k, f in zip(missed, self.fitness_batch([candidates[first[k]] for k in missed]).tolist()):
+                fitness[k] = f
+                self.fitness_cache.put(k, f)
+
+        budget -= len(candidates) if self.fitness_cache.charge_hits else len(missed)
+        return np.array([fitness[k] for k in keys]), budget
+
+    def fitness_batch(self, candidates):
+        # Fallback for problems without a vectorized evaluator, scoring one candidate at a time
+        return np.array([self.fitness(c) for c in candidates])
+
+    def fitness(self, candidate):
+        raise NotImplementedError
+
+    def clear_fitness_cache(self):
+        if self.fitness_cache is not None:
+            self.fitness_cache.clear()
+
+    def best_insertion(self, partial, job):
+        # Without an accelerated kernel every insertion position is evaluated in full
+        partial = list(partial)
+        candidates = [partial[:i] + [job] + partial[i:] for i in range(len(partial) + 1)]
+        fitness, _ = self.evaluate_batch(candidates)
+        position = int(np.argmin(fitness))
+        return position, fitness[position]
+
+    def set_incumbent(self, candidate):
+        pass  # Placeholder, problems supporting incremental evaluation persist incumbent state
+
+    def evaluate_move(self, candidate, budget=1, first=None):
+        # Neighbour of incumbent, without incremental evaluation support this is a full evaluation
+        return self.evaluator(candidate, budget)
+
+    def commit_move(self):
+        pass  # Placeholder
+
+    def discard_move(self):
+        pass  # Placeholder
+
     def pre_processing(self):
         pass  # Placeholder
 
     def post_processing(self):
         pass  # Placeholder
 
+    def benchmark_digest(self):
+        pass  # Placeholder, digest of benchmark instance data for problems with benchmarks
+
     def generator_discrete(self, **kwargs):
         candidate = list(range(0, self.n))
         np.random.shuffle(candidate)
@@ -55,17 +124,24 @@ class Problem:
             candidate.append(self.random.uniform(kwargs['lb'], kwargs['ub']))
         return candidate
 
-    def generate_initial_sample(self):
-        sample = []
+    def initial_sample_size(self):
         num = int(self.n * (self.hj.budget * self.hj.sample_size_coeff))
 
         # Default sample size in case above results in 0, typically during testing framework with small budget
         if num == 0:
             num = 100
+        return num
 
-        for _ in range(num):
+    def initial_sample_batches(self, num, rng, genes=4096):
+        """
+        Random sample of num candidates streamed as (k, n) batches of about genes values, small enough to evaluate
+        in cache, permutations as per generator_discrete or values within bounds as per generator_continuous, drawn
+        from rng rather than the run's random streams
+        """
+        size = max(genes // max(self.n, 1), 1)
+        for start in range(0, num, size):
+            k = min(size, num - start)
             if self.hj.pid_type == 'combinatorial':
-                sample.append(self.hj.generator_comb(lb=self.hj.pid_lb, ub=self.hj.pid_ub))
+                yield rng.permuted(np.tile(np.arange(self.n), (k, 1)), axis=1)
             else:
-                sample.append(self.hj.generator_cont(lb=self.hj.pid_lb, ub=self.hj.pid_ub))
-        return sample
+                yield rng.uniform(self.hj.pid_lb, self.hj.pid_ub, (k, self.n))
@@ -1,23 +1,12 @@
-from problems.problem import Problem
-import math
+from problems.continuous import Continuous
+import numpy as np
 
 
-class RASTRIGIN(Problem):
+class RASTRIGIN(Continuous):
     """
     Rastrigin
     """
-    def __init__(self, **kwargs):
-        Problem.__init__(self, **kwargs)
+    separable = True
 
-        # Set n dimensions
-        self.n = 2
-
-    def pre_processing(self):
-        pass
-
-    def post_processing(self):
-        pass
-
-    def evaluator(self, candidate, budget=1):
-        budget -= 1
-        return sum([x**2 - 10 * math.cos(2 * math.pi * x) + 10 for x in candidate]), budget
+    def terms(self, x):
+        return x ** 2 - 10 * np.cos(2 * np.pi * x) + 10
@@ -0,0 +1,9 @@
+from problems.continuous import Continuous
+
+
+class ROSENBROCK(Continuous):
+    """
+    Rosenbrock
+    """
+    def function(self, x):
+        return (100 * (x[..., 1:] - x[..., :-1] ** 2) ** 2 + (1 - x[..., :-1]) ** 2).sum(axis=-1)
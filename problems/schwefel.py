@@ -0,0 +1,12 @@
+from problems.continuous import Continuous
+import numpy as np
+
+
+class SCHWEFEL(Continuous):
+    """
+    Schwefel
+    """
+    separable = True
+
+    def terms(self, x):
+        return 418.9828872724339 - x * np.sin(np.sqrt(np.abs(x)))
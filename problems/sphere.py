@@ -0,0 +1,11 @@
+from problems.continuous import Continuous
+
+
+class SPHERE(Continuous):
+    """
+    Sphere
+    """
+    separable = True
+
+    def terms(self, x):
+        return x ** 2
@@ -0,0 +1,39 @@
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from heuristics_manager import HeuristicsManager, execute_run  # noqa: E402
+
+
+def run(settings, path):
+    hm = HeuristicsManager(results_path=path, settings=settings, plots=False)
+    j = hm.create_job(hm.plan[0])
+    execute_run(hm.job_spec(j), 0, hm.run_seed(j, 0))
+
+
+@pytest.mark.parametrize('vectorized', [False, True])
+def test_ga_terminates_with_uncharged_cache_hits(monkeypatch, tmp_path, vectorized):
+    # Generations of cached clones consume no budget when cache hits are not charged
+    monkeypatch.chdir(ROOT)
+    settings = HeuristicsManager.get_config()
+    settings['gen'].update(runs_per_optimizer=1, comp_budget_base=200, plots=False, checkpoints=False,
+                           result_cache=False, fitness_cache=True, fitness_cache_charge_hits=False)
+    for pid, prb in settings['prb'].items():
+        prb['enabled'] = pid == 'FSSP'
+    for bid, benchmark in settings['prb']['FSSP']['benchmarks'].items():
+        benchmark['enabled'] = bid == 'taillard_20_5_i1.txt'
+    for oid, opt in settings['opt'].items():
+        opt['enabled'] = oid == 'GA-N-EA-SBOX'
+    settings['opt']['GA-N-EA-SBOX']['vectorized'] = vectorized
+
+    p = multiprocessing.Process(target=run, args=(settings, str(tmp_path)))
+    p.start()
+    p.join(timeout=120)
+    if p.is_alive():
+        p.terminate()
+    assert p.exitcode == 0
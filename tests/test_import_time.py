@@ -0,0 +1,22 @@
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_BUDGET_S = 1.0  # About 0.2 s with heavy imports deferred, 2.7 s importing them eagerly
+DEFERRED = ['matplotlib', 'seaborn', 'pandas', 'scipy', 'inspyred']
+
+
+def test_import_time():
+    # Fresh interpreter, so modules imported by other tests aren't counted
+    check = 'import sys; print(",".join(m for m in {!r} if m in sys.modules))'.format(DEFERRED)
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import heuristics_manager; ' + check], cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+
+    # Cumulative microseconds of the top-level import, as reported by -X importtime
+    cumulative_us = re.search(r'^import time:\s+\d+ \|\s+(\d+) \| heuristics_manager$', out.stderr, re.MULTILINE)
+    assert cumulative_us is not None
+    assert int(cumulative_us.group(1)) / 1e6 < IMPORT_BUDGET_S
+    assert out.stdout.strip() == ''
@@ -0,0 +1,27 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from heuristics_manager import HeuristicsManager, execute_run  # noqa: E402
+
+
+def test_sa_anneals_on_large_instance(monkeypatch, tmp_path):
+    # Initial temperature sample is about the whole budget on 100 jobs, so must not be charged before annealing
+    monkeypatch.chdir(ROOT)
+    settings = HeuristicsManager.get_config()
+    settings['gen'].update(runs_per_optimizer=1, comp_budget_base=30, plots=False, checkpoints=False,
+                           result_cache=False)
+    for pid, prb in settings['prb'].items():
+        prb['enabled'] = pid == 'FSSP'
+    for bid, benchmark in settings['prb']['FSSP']['benchmarks'].items():
+        benchmark['enabled'] = bid == 'taillard_100_10_i1.txt'
+    for oid, opt in settings['opt'].items():
+        opt['enabled'] = oid == 'SA-N-E'
+
+    hm = HeuristicsManager(results_path=str(tmp_path), settings=settings, plots=False)
+    assert hm.plan == [('FSSP', 'taillard_100_10_i1.txt', 'SA-N-E')]
+    j = hm.create_job(hm.plan[0])
+    result = execute_run(hm.job_spec(j), 0, hm.run_seed(j, 0))
+    assert result['imp_count'] >= 1
@@ -0,0 +1,73 @@
+import glob
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from heuristics_manager import HeuristicsManager, work  # noqa: E402
+from utilities.work_queue import WorkQueue  # noqa: E402
+
+OPTIMIZERS = ['SA-N-E', 'GA-N-E-1P', 'PSO', 'HH-SA-ALL']
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    # Configuration and benchmarks are read relative to the repository root
+    monkeypatch.chdir(ROOT)
+    settings = HeuristicsManager.get_config()
+    settings['gen'].update(runs_per_optimizer=3, comp_budget_base=40, plots=False, checkpoints=False,
+                           result_cache=False)
+    for oid, opt in settings['opt'].items():
+        opt['enabled'] = oid in OPTIMIZERS
+    return settings
+
+
+def results(path):
+    """
+    Result CSVs of a results directory by name, without the average computational time column of summaries
+    """
+    csvs = {}
+    for filename in glob.glob(os.path.join(path, '*.csv')):
+        with open(filename) as f:
+            rows = [line.rstrip('\n').split(',') for line in f]
+        if filename.endswith('summary.csv'):
+            col = rows[1].index('Avg Cts')
+            rows = [row[:col] + row[col + 1:] for row in rows]
+        csvs[os.path.basename(filename)] = rows
+    return csvs
+
+
+def worker(path):
+    # Workers share the queue directory, each with its own queue and worker id as on separate hosts
+    work(WorkQueue(path), poll_s=0.1)
+
+
+def test_queued_runs_match_serial_runs(settings, tmp_path):
+    serial_path = str(tmp_path / 'serial')
+    os.mkdir(serial_path)
+    HeuristicsManager(results_path=serial_path, settings=settings, plots=False).execute_jobs()
+
+    queued_path = str(tmp_path / 'queued')
+    os.mkdir(queued_path)
+    HeuristicsManager(results_path=queued_path, settings=settings, plots=False).enqueue_jobs(
+        WorkQueue(queued_path + '/queue'))
+
+    workers = [multiprocessing.Process(target=worker, args=(queued_path + '/queue',)) for _ in range(3)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(timeout=600)
+        assert w.exitcode == 0
+
+    queue = WorkQueue(queued_path + '/queue')
+    queue.load()
+    assert not queue.pending()
+    HeuristicsManager(results_path=queued_path, settings=queue.manifest['settings'], plots=False).merge_jobs(queue)
+
+    serial = results(serial_path)
+    assert any(name.endswith('summary.csv') for name in serial)
+    assert results(queued_path) == serial
@@ -0,0 +1,63 @@
+from utilities.helper import Helper
+import numpy as np
+import os
+import pickle
+import time
+
+
+class Checkpoint:
+    """
+    Checkpoints of optimizer runs in the results directory, written atomically: the results of each completed run, and
+    the state of a run in flight. A resumed sweep reuses completed runs and continues a run in flight from its state
+    """
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def run_file(self, j, run):
+        # Checkpoint of run results, with its state whilst in flight in the same name ending inflight.pkl
+        return os.path.join(self.path, '{} {} {} run {}'.format(j.pid, j.bid, j.oid, run))
+
+    @staticmethod
+    def inflight_file(run_file):
+        return run_file + ' inflight.pkl'
+
+    @staticmethod
+    def result_file(run_file):
+        return run_file + '.pkl'
+
+    @staticmethod
+    def load(filename):
+        try:
+            with open(filename, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def save(filename, obj):
+        Helper.write_atomic(pickle.dumps(obj), filename)
+
+    @staticmethod
+    def discard(filename):
+        try:
+            os.remove(filename)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def due(j):
+        # Run in flight is checkpointed, and its checkpoint interval has passed
+        return j.checkpoint_file is not None and time.time() - j.checkpoint_time >= j.checkpoint_interval_s
+
+    @staticmethod
+    def save_inflight(j, jobs):
+        """
+        Write state of run in flight if its checkpoint interval has passed: the job with its optimizer, problem, fitness
+        trace and shared random stream, the low-level heuristic jobs it calls on, and the numpy random stream
+        """
+        if not Checkpoint.due(j):
+            return
+        j.checkpoint_time = time.time()
+        Checkpoint.save(j.checkpoint_file, {'state': pickle.dumps((j, jobs)), 'np_random': np.random.get_state(),
+                                            'elapsed_s': time.time() - j.run_start_time})
@@ -0,0 +1,50 @@
+import hashlib
+import heapq
+import itertools
+import numpy as np
+
+
+class EliteArchive:
+    """
+    Bounded archive of the best candidates found, e.g. by a low-level heuristic. Entries are held in a max-heap on
+    fitness so the worst is evicted in O(log k) once full, whilst the best is tracked as entries arrive for O(1) lookup.
+    A candidate already in the archive is not added again
+    """
+    def __init__(self, size=100):
+        self.size = max(size, 1)
+        self.heap = []  # (-fitness, -order, key, candidate, source), worst entry at the root
+        self.keys = set()
+        self.order = itertools.count()
+        self.best = None  # (fitness, candidate, source) of best entry, first arrival kept on ties
+
+    def __len__(self):
+        return len(self.heap)
+
+    @staticmethod
+    def key(candidate):
+        # Fixed size digest of candidate values, as used by the fitness cache
+        return hashlib.blake2b(np.asarray(candidate).tobytes(), digest_size=16).digest()
+
+    def add(self, fitness, candidate, source=None):
+        """
+        Archive candidate unless it is a duplicate or no better than the worst of a full archive, returning whether
+        it was added. Source records where the candidate came from, e.g. the low-level heuristic index
+        """
+        if len(self.heap) == self.size and fitness >= -self.heap[0][0]:
+            return False
+
+        key = self.key(candidate)
+        if key in self.keys:
+            return False
+
+        entry = (-fitness, -next(self.order), key, candidate, source)
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, entry)
+        else:
+            self.keys.discard(heapq.heapreplace(self.heap, entry)[2])
+        self.keys.add(key)
+
+        # Only the worst entry is ever evicted, so best changes only on arrival of a better candidate
+        if self.best is None or fitness < self.best[0]:
+            self.best = (fitness, candidate, source)
+        return True
@@ -0,0 +1,40 @@
+from collections import OrderedDict
+import hashlib
+import numpy as np
+
+
+class FitnessCache:
+    """
+    Bounded least recently used (LRU) cache of candidate fitness
+    """
+    def __init__(self, size=10000, charge_hits=True):
+        self.size = size
+        self.charge_hits = charge_hits  # Whether a cache hit still consumes computational budget
+        self.fitness = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(candidate):
+        # Fixed size digest of candidate values, cheaper to hold than the candidate itself
+        return hashlib.blake2b(np.asarray(candidate).tobytes(), digest_size=16).digest()
+
+    def get(self, key):
+        if key not in self.fitness:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.fitness.move_to_end(key)
+        return self.fitness[key]
+
+    def put(self, key, fitness):
+        self.fitness[key] = fitness
+        self.fitness.move_to_end(key)
+        if len(self.fitness) > self.size:
+            self.fitness.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        # Drop cached fitness, e.g. between independent runs, retaining hit, miss and eviction counts
+        self.fitness.clear()
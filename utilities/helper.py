@@ -1,10 +1,23 @@
-import pandas as pd
+import os
+import socket
 
 
 class Helper:
     @staticmethod
     def write_to_csv(data, filename, header=True):
+        import pandas as pd  # Imported on first use, as it takes long to import
+
         df = pd.DataFrame(data)
         df.to_csv(filename, header=header, index=False)
 
+    @staticmethod
+    def write_atomic(data, filename):
+        # Write to temporary file and rename over filename, so it is never seen partly written, even by another host
+        tmp = '{}.{}-{}.tmp'.format(filename, socket.gethostname(), os.getpid())
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, filename)
+
 
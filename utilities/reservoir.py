@@ -0,0 +1,34 @@
+import numpy as np
+
+
+class Reservoir:
+    """
+    Fixed size uniform sample of a stream of values (Algorithm R), holding every value while the stream fits
+    """
+    def __init__(self, size=10000, rng=None):
+        self.size = size
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.values = np.empty(size, dtype=np.float64)
+        self.count = 0  # Values seen so far
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+
+        # Fill any remaining capacity in stream order
+        fill = max(min(self.size - self.count, len(values)), 0)
+        self.values[self.count:self.count + fill] = values[:fill]
+
+        # Each later value t (0-based) replaces a random slot with probability size / (t + 1)
+        rest = values[fill:]
+        if len(rest):
+            slots = self.rng.integers(0, self.count + fill + np.arange(len(rest)) + 1)
+            kept = np.flatnonzero(slots < self.size)
+
+            # Slot taken by several values holds the last of them, as if replaced one at a time. Fancy assignment
+            # leaves the winner of duplicate indices unspecified, so it is resolved here
+            last = len(kept) - 1 - np.unique(slots[kept][::-1], return_index=True)[1]
+            self.values[slots[kept[last]]] = rest[kept[last]]
+        self.count += len(values)
+
+    def percentile(self, q):
+        return np.percentile(self.values[:min(self.count, self.size)], q)
@@ -0,0 +1,58 @@
+from utilities.helper import Helper
+import hashlib
+import json
+import os
+import pickle
+
+
+class ResultCache:
+    """
+    Persistent store of optimizer run results shared by invocations, keyed by a digest of everything determining a
+    result: problem and benchmark content, optimizer settings, general settings, code version and run seed. A changed
+    setting or source file changes the key, so results are never reused for a different run
+    """
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def key(spec):
+        # Digest of JSON-serialisable run specification, with keys sorted so equal specifications share a key
+        return hashlib.blake2b(json.dumps(spec, sort_keys=True, default=str).encode(), digest_size=20).hexdigest()
+
+    @staticmethod
+    def code_version(root, packages=('optimizers', 'problems', 'utilities')):
+        """
+        Digest of Python sources optimizer runs execute, those at root and in packages, changing on any edit whether
+        committed or not
+        """
+        sources = [f for f in os.listdir(root) if f.endswith('.py')]
+        for p in packages:
+            sources += [os.path.join(p, f) for f in os.listdir(os.path.join(root, p)) if f.endswith('.py')]
+
+        digest = hashlib.blake2b(digest_size=20)
+        for f in sorted(sources):
+            digest.update(f.encode())
+            with open(os.path.join(root, f), 'rb') as source:
+                digest.update(source.read())
+        return digest.hexdigest()
+
+    def file(self, key):
+        # Spread across subdirectories by leading digits, as a store may hold many results
+        return os.path.join(self.path, key[:2], key + '.pkl')
+
+    def get(self, key):
+        try:
+            with open(self.file(key), 'rb') as f:
+                result = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        os.makedirs(os.path.dirname(self.file(key)), exist_ok=True)
+        Helper.write_atomic(pickle.dumps(result), self.file(key))
@@ -1,4 +1,3 @@
-from scipy.stats import ranksums
 import statistics
 from collections import OrderedDict
 
@@ -6,6 +5,8 @@ from collections import OrderedDict
 class Stats:
     @staticmethod
     def get_summary(trends):
+        from scipy.stats import ranksums  # Imported on first use, as it takes long to import
+
         reference_sample = []
         comparison_sample = []
         alpha = 0.05
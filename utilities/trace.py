@@ -0,0 +1,67 @@
+import numpy as np
+import math
+
+
+class Trace:
+    """
+    Fitness trace of a run as (evaluation index, best-so-far fitness) points, held in a preallocated array of at most
+    capacity points. Every improvement is recorded, or with log spacing only the first past each geometrically spaced
+    evaluation checkpoint. When full, every other point is dropped and recording thinned to match, so memory is capped
+    and cost per improvement stays constant however long the run
+    """
+    def __init__(self, capacity=1000, spacing='improvement', log_ratio=1.1):
+        self.capacity = max(capacity, 2)
+        self.spacing = spacing  # Either improvement or log
+        self.log_ratio = log_ratio
+        self.points = np.empty((self.capacity, 2), dtype=np.float64)
+        self.count = 0
+        self.best = math.inf
+        self.latest = None  # Most recent improvement, reported even if not recorded
+        self.stride = 1  # Improvements per recorded point, doubled on each downsampling
+        self.pending = 0
+        self.checkpoint = 1  # Next evaluation index recorded with log spacing
+
+    def __len__(self):
+        return len(self.array())
+
+    def record(self, evaluation, fitness):
+        # Only improvements on best-so-far change the trace
+        if not fitness < self.best:
+            return
+        self.best = fitness
+        self.latest = (evaluation, fitness)
+
+        if self.spacing == 'log':
+            if evaluation < self.checkpoint:
+                return
+            self.checkpoint = max(evaluation, 1) * self.log_ratio
+        else:
+            self.pending += 1
+            if self.pending < self.stride:
+                return
+            self.pending = 0
+
+        if self.count == self.capacity:
+            self.downsample()
+        self.points[self.count] = evaluation, fitness
+        self.count += 1
+
+    def downsample(self):
+        kept = (self.count + 1) // 2
+        self.points[:kept] = self.points[:self.count:2]
+        self.count = kept
+        if self.spacing == 'log':
+            self.log_ratio **= 2
+        else:
+            self.stride *= 2
+
+    def array(self):
+        # (k, 2) copy of points, ending with the latest improvement
+        points = self.points[:self.count]
+        if self.latest is not None and (not self.count or points[-1, 0] != self.latest[0]):
+            points = np.vstack((points, self.latest))
+        return points.copy()
+
+    def records(self):
+        # Points as [evaluation, fitness] rows for reporting, e.g. CSV
+        return [[int(e), f] for e, f in self.array().tolist()]
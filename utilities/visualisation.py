@@ -1,24 +1,23 @@
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.font_manager as font_manager
-import seaborn as sns
-from matplotlib.colors import ListedColormap
-from matplotlib.cm import hsv
-import matplotlib.cm
-import matplotlib.colors
 import math
 
 
 class Visualisation:
+    """
+    Charts of results. Plotting libraries are imported on first use, as they take long to import and are not needed
+    to optimize, e.g. when executing runs in worker processes or without plots
+    """
     def __init__(self):
         pass
 
     @staticmethod
-    def fitness_trend(trend, filename):
-        df_ft = pd.DataFrame(trend, columns=['Fitness'])
-        df_ft['Generation'] = np.arange(len(df_ft))
-        g = sns.relplot(kind="line", x="Generation", y="Fitness", data=df_ft)
+    def fitness_trend(trace, filename):
+        import matplotlib.pyplot as plt
+        import pandas as pd
+        import seaborn as sns
+
+        df_ft = pd.DataFrame(trace.array(), columns=['Evaluation', 'Fitness'])
+        g = sns.relplot(kind="line", x="Evaluation", y="Fitness", data=df_ft, drawstyle='steps-post')
 
         # Get access to matplotlib control via g.axes
         axes = g.axes.flatten()
@@ -29,6 +28,10 @@ class Visualisation:
         #plt.show()
 
     def fitness_trend_all_optimizers(self, trends, filename):
+        import matplotlib.pyplot as plt
+        import pandas as pd
+        import seaborn as sns
+
         df_ft = pd.DataFrame()
         for k, v, in trends.items():
             max_generations = len(v)
@@ -62,7 +65,10 @@ class Visualisation:
             plt.close()
             #plt.show()
 
-    def solution_representation_gantt(self, fitness, machines, jobs, filename):
+    def solution_representation_gantt(self, fitness, schedule, jobs, filename):
+        import matplotlib.font_manager as font_manager
+        import matplotlib.pyplot as plt
+
         x_width = fitness
         if jobs['quantity'] <= 20:
             x_width += 280  # Build in margin for legend
@@ -81,19 +87,23 @@ class Visualisation:
 
         fig, ax = plt.subplots()
 
-        for mi, m in enumerate(machines['assigned_jobs']):
+        # Schedule start and end times are (job position, machine) matrices
+        start_times = schedule['start'].T.tolist()
+        end_times = schedule['end'].T.tolist()
+
+        for mi in range(len(start_times)):
             y_pos_max = 0
             y_pos_min = 30000
-            for ji, j in enumerate(m):
+            for ji, j in enumerate(schedule['permutation']):
                 y_machine_job_pos = (((mi + 1) * (jobs['quantity'] * job_bar_height)) + 100 * mi) - (ji * job_bar_height)
                 if y_machine_job_pos > y_pos_max:
                     y_pos_max = y_machine_job_pos
                 elif y_machine_job_pos < y_pos_min:
                     y_pos_min = y_machine_job_pos
-                x_job_start = j[1]
-                x_job_length = j[2] - j[1]
+                x_job_start = start_times[mi][ji]
+                x_job_length = end_times[mi][ji] - start_times[mi][ji]
                 ax.broken_barh([(x_job_start, x_job_length)], (y_machine_job_pos, job_bar_height),
-                               facecolors=job_cmap.colors[ji], label='Job ' + str(j[0]) if ji not in job_legend else '')
+                               facecolors=job_cmap.colors[ji], label='Job ' + str(j) if ji not in job_legend else '')
                 if ji not in job_legend:
                     job_legend[ji] = ji
 
@@ -137,6 +147,9 @@ class Visualisation:
         if number_of_distinct_colors == 0:
             number_of_distinct_colors = 80
 
+        from matplotlib.cm import hsv
+        from matplotlib.colors import ListedColormap
+
         number_of_shades = 7
         number_of_distinct_colors_with_multiply_of_shades = int(math.ceil(number_of_distinct_colors / number_of_shades)
                                                                 * number_of_shades)
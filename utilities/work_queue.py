@@ -0,0 +1,140 @@
+from contextlib import contextmanager
+from utilities.helper import Helper
+import os
+import pickle
+import socket
+import threading
+import time
+
+
+class WorkQueue:
+    """
+    Queue of work items in a directory shared by any number of worker processes, on one or many hosts. A worker claims
+    an item by exclusively creating its claim file, and holds it under a lease renewed by touching that file. A claim
+    whose lease has expired, e.g. as its worker died, is released by renaming it away, which only one worker can do.
+    Item results are written atomically, so a partly written result is never read
+    """
+    def __init__(self, path, lease_s=60):
+        self.path = path
+        self.lease_s = lease_s  # Seconds a claim is held without renewal before another worker may take its item
+        self.claims_path = os.path.join(path, 'claims')
+        self.done_path = os.path.join(path, 'done')
+        self.worker_id = '{}-{}'.format(socket.gethostname(), os.getpid())
+        self.manifest = None
+
+    def create(self, manifest, items, blobs):
+        """
+        Lay out the queue directory with manifest, the list of items as (id, blob name, payload), and blobs of shared
+        item data by name, e.g. pickled job specs
+        """
+        for p in (self.path, self.claims_path, self.done_path, os.path.join(self.path, 'blobs')):
+            os.makedirs(p, exist_ok=True)
+        for name, data in blobs.items():
+            self.write(os.path.join(self.path, 'blobs', name), data)
+
+        # Manifest is written last, so workers only see a queue that is complete
+        self.manifest = dict(manifest, items=items)
+        self.write(os.path.join(self.path, 'manifest.pkl'), pickle.dumps(self.manifest))
+
+    def load(self):
+        with open(os.path.join(self.path, 'manifest.pkl'), 'rb') as f:
+            self.manifest = pickle.load(f)
+        return self.manifest
+
+    def blob(self, name):
+        with open(os.path.join(self.path, 'blobs', name), 'rb') as f:
+            return f.read()
+
+    @staticmethod
+    def write(filename, data):
+        Helper.write_atomic(data, filename)
+
+    def claim_file(self, item_id):
+        return os.path.join(self.claims_path, item_id)
+
+    def done_file(self, item_id):
+        return os.path.join(self.done_path, item_id + '.pkl')
+
+    def is_done(self, item_id):
+        return os.path.exists(self.done_file(item_id))
+
+    def pending(self):
+        # Items without result
+        return [item for item in self.manifest['items'] if not self.is_done(item[0])]
+
+    def claim(self):
+        """
+        Claim first item neither done nor under a live lease, returning None if there is no such item
+        """
+        for item in self.pending():
+            claim_file = self.claim_file(item[0])
+            try:
+                fd = os.open(claim_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                self.release_expired(claim_file)
+                continue
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.worker_id)
+
+            # Item may have completed between listing and claiming
+            if self.is_done(item[0]):
+                os.remove(claim_file)
+                continue
+            return item
+        return None
+
+    def release_expired(self, claim_file):
+        """
+        Release claim if its lease has expired. The claim is first renamed away, which only one worker can do, and its
+        lease checked on the renamed file, so a claim renewed or made afresh in the meantime is never released. A claim
+        found live is restored, unless the item was claimed again whilst it was away
+        """
+        expired_file = '{}.expired.{}'.format(claim_file, self.worker_id)
+        try:
+            if time.time() - os.path.getmtime(claim_file) < self.lease_s:
+                return
+            os.rename(claim_file, expired_file)
+        except FileNotFoundError:
+            return
+
+        if time.time() - os.path.getmtime(expired_file) < self.lease_s:
+            try:
+                os.link(expired_file, claim_file)
+            except FileExistsError:
+                pass
+        os.remove(expired_file)
+
+    @contextmanager
+    def lease(self, item_id):
+        """
+        Renew lease on claimed item in the background whilst it is worked on
+        """
+        stop = threading.Event()
+
+        def renew():
+            while not stop.wait(self.lease_s / 4):
+                try:
+                    os.utime(self.claim_file(item_id))
+                except FileNotFoundError:
+                    # Claim away whilst its lease is checked, or expired and released, e.g. worker suspended, so item
+                    # may be executed twice. Runs are seeded by item, so either result is the same
+                    pass
+
+        renewer = threading.Thread(target=renew, daemon=True)
+        renewer.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            renewer.join()
+
+    def complete(self, item_id, result):
+        self.write(self.done_file(item_id), pickle.dumps(result))
+        try:
+            os.remove(self.claim_file(item_id))
+        except FileNotFoundError:
+            pass
+
+    def result(self, item_id):
+        with open(self.done_file(item_id), 'rb') as f:
+            return pickle.load(f)